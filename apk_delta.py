@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Binary Delta Updates for APKs
+Builds patches that turn one APK release into the next. An APK is a zip,
+so every entry whose compressed bytes are unchanged (runtime, libraries,
+fonts, assets) becomes a "copy from the old file" instruction, even if it
+moved; only changed entries and zip metadata travel as LZMA-compressed
+literal data. Works on any file, but non-zip files patch as one literal.
+
+Client-side test:
+    python apk_delta.py apply old.apk update.delta new.apk
+"""
+
+import hashlib
+import io
+import json
+import lzma
+import os
+import struct
+import sys
+import zipfile
+from typing import Dict, List, Tuple
+
+MAGIC = b'MAYADLT1'
+LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+
+
+class DeltaError(ValueError):
+    """Raised when a patch is malformed or doesn't match its base or target"""
+
+
+def _entry_spans(data: bytes) -> Dict[Tuple, List[Tuple[int, int, int]]]:
+    """Map (crc, compressed size, method) -> [(header start, data start, data end)]"""
+    spans = {}
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            infos = archive.infolist()
+    except zipfile.BadZipFile:
+        return spans
+    for info in infos:
+        start = info.header_offset
+        header = data[start:start + LOCAL_HEADER.size]
+        if len(header) < LOCAL_HEADER.size:
+            continue
+        fields = LOCAL_HEADER.unpack(header)
+        if fields[0] != b'PK\x03\x04':
+            continue
+        data_start = start + LOCAL_HEADER.size + fields[9] + fields[10]
+        data_end = data_start + info.compress_size
+        if data_end <= len(data):
+            spans.setdefault((info.CRC, info.compress_size, info.compress_type), []).append(
+                (start, data_start, data_end))
+    return spans
+
+
+def _diff_ops(old: bytes, new: bytes):
+    """Yield ('c', old_offset, length) and ('d', new_start, new_end) operations"""
+    old_spans = _entry_spans(old)
+    matches = []
+    for key, new_list in _entry_spans(new).items():
+        candidates = old_spans.get(key)
+        if not candidates:
+            continue
+        for header_start, data_start, data_end in new_list:
+            for old_header, old_data, old_end in candidates:
+                if old[old_data:old_end] != new[data_start:data_end]:
+                    continue
+                # Take the local header too when it is byte-identical
+                if old[old_header:old_data] == new[header_start:data_start]:
+                    matches.append((header_start, data_end, old_header))
+                else:
+                    matches.append((data_start, data_end, old_data))
+                break
+
+    position = 0
+    for start, end, old_offset in sorted(matches):
+        if start < position:
+            continue
+        if start > position:
+            yield 'd', position, start
+        yield 'c', old_offset, end - start
+        position = end
+    if position < len(new):
+        yield 'd', position, len(new)
+
+
+def create_delta(old_path, new_path, patch_path) -> Dict:
+    """Write a patch turning ``old_path`` into ``new_path``; return its summary"""
+    with open(old_path, 'rb') as f:
+        old = f.read()
+    with open(new_path, 'rb') as f:
+        new = f.read()
+
+    ops = []
+    literals = []
+    copied = 0
+    for op in _diff_ops(old, new):
+        if op[0] == 'c':
+            _, offset, length = op
+            copied += length
+            if ops and ops[-1][0] == 'c' and ops[-1][1] + ops[-1][2] == offset:
+                ops[-1][2] += length
+            else:
+                ops.append(['c', offset, length])
+        else:
+            _, start, end = op
+            literals.append(new[start:end])
+            if ops and ops[-1][0] == 'd':
+                ops[-1][1] += end - start
+            else:
+                ops.append(['d', end - start])
+
+    summary = {
+        'base_sha256': hashlib.sha256(old).hexdigest(),
+        'target_sha256': hashlib.sha256(new).hexdigest(),
+        'target_size': len(new)
+    }
+    header = json.dumps(dict(summary, format=1, ops=ops), separators=(',', ':')).encode('utf-8')
+    body = lzma.compress(b''.join(literals), preset=9)
+
+    tmp_path = f"{patch_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('>I', len(header)))
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, patch_path)
+
+    return dict(summary, patch_size=os.path.getsize(patch_path), copied_bytes=copied)
+
+
+def read_patch_header(patch_path) -> Dict:
+    with open(patch_path, 'rb') as f:
+        return _read_header(f)
+
+
+def _read_header(f) -> Dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise DeltaError("Not a Maya delta patch")
+    try:
+        (length,) = struct.unpack('>I', f.read(4))
+        header = json.loads(f.read(length))
+    except (struct.error, ValueError) as e:
+        raise DeltaError(f"Corrupt patch header: {e}")
+    if header.get('format') != 1:
+        raise DeltaError(f"Unsupported patch format: {header.get('format')}")
+    return header
+
+
+def apply_delta(old_path, patch_path, out_path) -> str:
+    """Rebuild the new APK from ``old_path`` and a patch; return its SHA-256"""
+    with open(patch_path, 'rb') as f:
+        header = _read_header(f)
+        try:
+            literals = lzma.decompress(f.read())
+        except lzma.LZMAError as e:
+            raise DeltaError(f"Corrupt patch data: {e}")
+
+    with open(old_path, 'rb') as f:
+        old = f.read()
+    if hashlib.sha256(old).hexdigest() != header['base_sha256']:
+        raise DeltaError("Installed APK doesn't match this patch's base version")
+
+    digest = hashlib.sha256()
+    literal_position = 0
+    tmp_path = f"{out_path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as out:
+            for op in header['ops']:
+                if op[0] == 'c':
+                    chunk = old[op[1]:op[1] + op[2]]
+                else:
+                    chunk = literals[literal_position:literal_position + op[1]]
+                    literal_position += op[1]
+                out.write(chunk)
+                digest.update(chunk)
+        if digest.hexdigest() != header['target_sha256']:
+            raise DeltaError("Patched APK failed its SHA-256 check")
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return digest.hexdigest()
+
+
+def main():
+    if len(sys.argv) != 5 or sys.argv[1] not in ('create', 'apply'):
+        print("Usage: python apk_delta.py create OLD.apk NEW.apk OUT.delta")
+        print("       python apk_delta.py apply OLD.apk PATCH.delta OUT.apk")
+        sys.exit(2)
+    command, first, second, output = sys.argv[1:]
+    if command == 'create':
+        info = create_delta(first, second, output)
+        print(f"✅ {output}: {info['patch_size']:,} bytes for a {info['target_size']:,} byte APK")
+    else:
+        try:
+            digest = apply_delta(first, second, output)
+        except DeltaError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ {output} rebuilt and verified (sha256 {digest})")
+
+
+if __name__ == '__main__':
+    main()
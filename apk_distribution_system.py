@@ -4,59 +4,238 @@ APK Distribution System with QR Code Generator
 Provides secure APK distribution with QR codes, download tracking, and version management
 """
 
-import qrcode
-import hashlib
 import json
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List
 import zipfile
-import shutil
+
+from apk_delta import create_delta
+from download_analytics import DownloadRollups
+from file_hashing import hash_file, hash_files
+from qr_render import QR_SETTINGS, QRCache
+from release_store import BlobStore
+from site_builder import SiteBuilder, inline_styles, render_download_page, write_if_changed
 
 class APKDistributionSystem:
-    def __init__(self, base_url: str = "https://your-domain.com"):
+    QR_TYPES = ("download", "install", "info")
+    
+    def __init__(self, base_url: str = "https://your-domain.com",
+                 compact_every: int = 100, compact_interval: float = 60.0,
+                 hourly_retention_days: int = 90, delta_history: int = 3,
+                 delta_max_ratio: float = 0.8, log_rotate_bytes: int = 1024 * 1024):
         self.base_url = base_url
         self.apk_directory = Path("./apk_releases")
         self.distribution_data = Path("./distribution_data.json")
+        # Download events are appended here and folded into distribution_data.json
+        # every ``compact_every`` events or ``compact_interval`` seconds
+        self.download_log = Path("./distribution_events.jsonl")
+        # Once compacted past log_rotate_bytes the log is moved to .1 (replacing
+        # the previous one) and a new one is started
+        self.log_rotate_bytes = log_rotate_bytes
+        # Patches between releases; kept only if smaller than delta_max_ratio of the APK
+        self.delta_directory = self.apk_directory / "deltas"
         self.qr_codes_dir = Path("./qr_codes")
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self.hourly_retention_days = hourly_retention_days
+        self.delta_history = delta_history
+        self.delta_max_ratio = delta_max_ratio
         
         # Create directories
         self.apk_directory.mkdir(exist_ok=True)
         self.qr_codes_dir.mkdir(exist_ok=True)
+        self.release_store = BlobStore(self.apk_directory / "blobs")
+        self.qr_settings = dict(QR_SETTINGS)
+        self.qr_cache = QRCache()
+        
+        self._lock = threading.RLock()
+        self._log_file = None
+        self._pending_events = 0
+        self._last_compaction = time.monotonic()
         
         # Load existing distribution data
         self.load_distribution_data()
     
     def load_distribution_data(self):
-        """Load existing distribution data or create new"""
+        """
+        Load the last summary, then replay download events logged since.
+        
+        Only reads files: upgrades of older summaries happen in memory and
+        reach disk with the next save, or right away via
+        :meth:`migrate_distribution_data`.
+        """
         if self.distribution_data.exists():
             with open(self.distribution_data, 'r') as f:
                 self.data = json.load(f)
         else:
             self.data = {
                 "apps": {},
-                "downloads": [],
                 "analytics": {
                     "total_downloads": 0,
                     "downloads_by_version": {},
                     "downloads_by_date": {}
-                }
+                },
+                "event_log_offset": 0
             }
+        
+        # Older summaries kept every raw event inline; they move to the log on save
+        self._legacy_downloads = self.data.pop("downloads", None) or []
+        
+        # Rollups are part of the summary; summaries written before they
+        # existed get them rebuilt from the events already compacted
+        backfill = "rollups" not in self.data
+        self.rollups = DownloadRollups(self.data.setdefault("rollups", {}))
+        if backfill:
+            compacted = self._read_download_log(0, self.data.get("event_log_offset", 0))
+            for event in list(compacted) + self._legacy_downloads:
+                try:
+                    self.rollups.add(event)
+                except KeyError:
+                    continue
+        
+        offset = self.data.get("event_log_offset", 0)
+        self._replay_download_log()
+        self._needs_migration = (backfill or bool(self._legacy_downloads) or
+                                 self.data.get("event_log_offset", 0) != offset)
+    
+    def migrate_distribution_data(self) -> bool:
+        """Write an upgraded or replayed summary now; True if anything changed"""
+        with self._lock:
+            if not self._needs_migration:
+                return False
             self.save_distribution_data()
+            return True
+    
+    def _write_legacy_downloads(self):
+        """Append events from an old inline summary to the download log"""
+        if self._log_file is not None:
+            self._log_file.flush()
+        with open(self.download_log, 'ab') as f:
+            for event in self._legacy_downloads:
+                f.write(self._encode_event(event))
+            self.data["event_log_offset"] = f.tell()
+        self._legacy_downloads = []
     
     def save_distribution_data(self):
-        """Save distribution data to file"""
-        with open(self.distribution_data, 'w') as f:
-            json.dump(self.data, f, indent=2, default=str)
+        """Atomically replace the summary file with the current state"""
+        with self._lock:
+            if self._legacy_downloads:
+                self._write_legacy_downloads()
+            tmp_path = self.distribution_data.with_name(self.distribution_data.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.distribution_data)
+            self._pending_events = 0
+            self._needs_migration = False
+            self._last_compaction = time.monotonic()
+    
+    @staticmethod
+    def _encode_event(event: Dict) -> bytes:
+        return (json.dumps(event, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+    
+    def _replay_download_log(self):
+        """Apply events written after the summary's recorded log offset"""
+        offset = self.data.get("event_log_offset", 0)
+        if not self.download_log.exists():
+            self.data["event_log_offset"] = 0
+            return
+        if offset > self.download_log.stat().st_size:
+            # compact() rotated the log after this summary was saved and
+            # crashed before saving the reset offset; the new log is unseen
+            offset = 0
+        
+        with open(self.download_log, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn final write from a crash; replayed once it is terminated
+                    break
+                offset += len(line)
+                try:
+                    self._apply_download(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+        self.data["event_log_offset"] = offset
+    
+    def _read_download_log(self, start: int, end: int):
+        """Yield complete events stored between two byte offsets of the log"""
+        if not self.download_log.exists():
+            return
+        with open(self.download_log, 'rb') as f:
+            f.seek(start)
+            while f.tell() < end:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    
+    def _open_download_log(self):
+        if self._log_file is None:
+            self._log_file = open(self.download_log, 'ab')
+            if self._log_file.tell() > 0:
+                # Terminate a torn final write so the next event starts on its own line
+                with open(self.download_log, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self._log_file.write(b'\n')
+        return self._log_file
+    
+    def compact(self):
+        """Fold logged download events into the summary file"""
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.flush()
+                os.fsync(self._log_file.fileno())
+            self.rollups.prune_hours(datetime.now() - timedelta(days=self.hourly_retention_days))
+            self.save_distribution_data()
+            if self.data.get("event_log_offset", 0) >= self.log_rotate_bytes:
+                self._rotate_download_log()
+    
+    def _rotate_download_log(self):
+        """Start a new download log; the saved summary already holds every event in it"""
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        os.replace(self.download_log, self.download_log.with_name(self.download_log.name + '.1'))
+        # The rename must be on disk before a summary that points into the new log
+        try:
+            dir_fd = os.open(self.download_log.parent, os.O_RDONLY)
+        except OSError:
+            # Directories can't be opened (and need no sync) on Windows
+            dir_fd = None
+        if dir_fd is not None:
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self.data["event_log_offset"] = 0
+        self.save_distribution_data()
+    
+    def close(self):
+        """Write a final summary and close the download log"""
+        with self._lock:
+            if self._pending_events:
+                self.compact()
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
     
     def calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA256 hash of APK file"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()
+        """Calculate SHA256 hash of APK file (cached until the file changes)"""
+        return hash_file(file_path)
+    
+    def calculate_file_hashes(self, file_paths: List[Path]) -> Dict[str, str]:
+        """SHA256 hashes of several files, computed in parallel"""
+        return hash_files(file_paths)
     
     def add_apk(self, apk_path: str, app_name: str, version: str, description: str = "") -> Dict:
         """Add new APK to distribution system"""
@@ -73,8 +252,9 @@ class APKDistributionSystem:
         versioned_filename = f"{safe_name}_v{version}.apk"
         destination = self.apk_directory / versioned_filename
         
-        # Copy APK to distribution directory
-        shutil.copy2(apk_file, destination)
+        # Store the bytes once; the versioned name is a link into the store
+        self.release_store.add(apk_file)
+        self.release_store.link(file_hash, destination)
         
         # Create app entry if doesn't exist
         if app_name not in self.data["apps"]:
@@ -102,11 +282,59 @@ class APKDistributionSystem:
         self.data["apps"][app_name]["versions"][version] = version_info
         self.data["apps"][app_name]["latest_version"] = version
         
+        # Patches from recent releases so learners can update without the full APK
+        version_info["deltas"] = self.build_deltas(app_name, version)
+        
         self.save_distribution_data()
         return version_info
     
-    def generate_qr_code(self, app_name: str, version: str = None, qr_type: str = "download") -> str:
-        """Generate QR code for app download or install"""
+    def build_deltas(self, app_name: str, version: str) -> Dict:
+        """Create patches to ``version`` from the previous ``delta_history`` versions"""
+        versions = self.data["apps"][app_name]["versions"]
+        target = versions[version]
+        target_path = self.release_store.blob_path(target["file_hash"])
+        previous = sorted((info for name, info in versions.items() if name != version),
+                          key=lambda info: info.get("upload_date", ""))
+        previous = previous[-self.delta_history:] if self.delta_history > 0 else []
+        safe_name = app_name.replace(" ", "_").lower()
+        
+        deltas = {}
+        self.delta_directory.mkdir(exist_ok=True)
+        for base in previous:
+            base_path = self.release_store.blob_path(base["file_hash"])
+            if not base_path.exists():
+                base_path = Path(base["file_path"])
+            if base["file_hash"] == target["file_hash"] or not base_path.exists():
+                continue
+            
+            delta_filename = f"{safe_name}_v{base['version']}_to_v{version}.delta"
+            delta_path = self.delta_directory / delta_filename
+            info = create_delta(base_path, target_path, delta_path)
+            if info["patch_size"] >= target["file_size"] * self.delta_max_ratio:
+                # Not worth it; clients should just fetch the full APK
+                delta_path.unlink()
+                continue
+            deltas[base["version"]] = {
+                "filename": delta_filename,
+                "file_path": str(delta_path),
+                "file_hash": self.calculate_file_hash(delta_path),
+                "file_size": info["patch_size"],
+                "base_hash": base["file_hash"],
+                "target_hash": target["file_hash"],
+                "download_url": f"{self.base_url}/download/deltas/{delta_filename}"
+            }
+        return deltas
+    
+    def collect_garbage(self, dry_run: bool = False) -> Dict:
+        """Delete stored APK blobs that no registered version refers to"""
+        referenced = {version_info["file_hash"]
+                      for app in self.data["apps"].values()
+                      for version_info in app["versions"].values()}
+        return self.release_store.collect_garbage(referenced, dry_run)
+    
+    def _qr_job(self, app_name: str, version: str = None, qr_type: str = "download",
+                fmt: str = "png") -> Dict:
+        """Content and output path for one of an app version's QR codes"""
         if app_name not in self.data["apps"]:
             raise ValueError(f"App '{app_name}' not found")
         
@@ -128,26 +356,28 @@ class APKDistributionSystem:
         else:
             raise ValueError("QR type must be 'download', 'install', or 'info'")
         
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_content)
-        qr.make(fit=True)
-        
-        # Create QR code image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save QR code
         safe_name = app_name.replace(" ", "_").lower()
-        qr_filename = f"{safe_name}_v{version}_{qr_type}_qr.png"
-        qr_path = self.qr_codes_dir / qr_filename
-        img.save(qr_path)
+        qr_filename = f"{safe_name}_v{version}_{qr_type}_qr.{fmt}"
+        return dict(self.qr_settings, content=qr_content, fmt=fmt, dest=self.qr_codes_dir / qr_filename)
+    
+    def generate_qr_code(self, app_name: str, version: str = None, qr_type: str = "download",
+                         fmt: str = "png") -> str:
+        """Generate QR code for app download or install (PNG or SVG)"""
+        return str(self.qr_cache.generate([self._qr_job(app_name, version, qr_type, fmt)])[0])
+    
+    def generate_qr_codes(self, targets: List = None, fmt: str = "png") -> Dict:
+        """
+        Generate many QR codes at once, rendering new ones in parallel.
         
-        return str(qr_path)
+        ``targets`` is a list of (app_name, version, qr_type); by default
+        every QR type for the latest version of every app.
+        """
+        if targets is None:
+            targets = [(app_name, None, qr_type) for app_name in self.data["apps"]
+                       for qr_type in self.QR_TYPES]
+        jobs = [self._qr_job(app_name, version, qr_type, fmt) for app_name, version, qr_type in targets]
+        paths = self.qr_cache.generate(jobs)
+        return {tuple(target): str(path) for target, path in zip(targets, paths)}
     
     def generate_distribution_page(self, app_name: str) -> str:
         """Generate HTML distribution page for an app"""
@@ -157,233 +387,25 @@ class APKDistributionSystem:
         app_data = self.data["apps"][app_name]
         latest_version = app_data["versions"][app_data["latest_version"]]
         
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{app_name} - Download</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            max-width: 600px;
-            margin: 0 auto;
-            padding: 20px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            color: white;
-        }}
-        .container {{
-            background: rgba(255, 255, 255, 0.1);
-            backdrop-filter: blur(10px);
-            border-radius: 20px;
-            padding: 30px;
-            box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
-            border: 1px solid rgba(255, 255, 255, 0.18);
-        }}
-        .app-icon {{
-            width: 80px;
-            height: 80px;
-            background: #4CAF50;
-            border-radius: 16px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 36px;
-            margin: 0 auto 20px;
-        }}
-        .app-title {{
-            font-size: 28px;
-            font-weight: bold;
-            text-align: center;
-            margin-bottom: 10px;
-        }}
-        .app-version {{
-            text-align: center;
-            opacity: 0.8;
-            margin-bottom: 30px;
-        }}
-        .download-section {{
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 15px;
-            padding: 20px;
-            margin: 20px 0;
-            text-align: center;
-        }}
-        .download-btn {{
-            background: #4CAF50;
-            color: white;
-            padding: 15px 30px;
-            border: none;
-            border-radius: 25px;
-            font-size: 18px;
-            font-weight: bold;
-            text-decoration: none;
-            display: inline-block;
-            margin: 10px;
-            box-shadow: 0 4px 15px 0 rgba(76, 175, 80, 0.3);
-            transition: all 0.3s ease;
-        }}
-        .download-btn:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px 0 rgba(76, 175, 80, 0.4);
-        }}
-        .qr-code {{
-            background: white;
-            padding: 20px;
-            border-radius: 15px;
-            margin: 20px 0;
-            text-align: center;
-        }}
-        .qr-code img {{
-            max-width: 200px;
-            height: auto;
-        }}
-        .info-section {{
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 15px;
-            padding: 20px;
-            margin: 20px 0;
-        }}
-        .info-item {{
-            display: flex;
-            justify-content: space-between;
-            margin: 10px 0;
-            padding: 10px 0;
-            border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-        }}
-        .warning {{
-            background: rgba(255, 152, 0, 0.2);
-            border: 1px solid rgba(255, 152, 0, 0.5);
-            border-radius: 10px;
-            padding: 15px;
-            margin: 20px 0;
-        }}
-        .steps {{
-            background: rgba(255, 255, 255, 0.1);
-            border-radius: 15px;
-            padding: 20px;
-            margin: 20px 0;
-        }}
-        .step {{
-            display: flex;
-            align-items: center;
-            margin: 15px 0;
-        }}
-        .step-number {{
-            background: #4CAF50;
-            color: white;
-            width: 30px;
-            height: 30px;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: bold;
-            margin-right: 15px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="app-icon">🇸🇬</div>
-        <h1 class="app-title">{app_name}</h1>
-        <p class="app-version">Version {latest_version['version']}</p>
-        
-        <div class="download-section">
-            <h3>📱 Download APK</h3>
-            <a href="{latest_version['download_url']}" class="download-btn">
-                ⬇️ Download APK ({latest_version['file_size'] // 1024 // 1024} MB)
-            </a>
-        </div>
-        
-        <div class="qr-code">
-            <h4 style="color: #333; margin-bottom: 15px;">📱 Scan QR Code to Download</h4>
-            <div style="color: #666; font-size: 14px; margin-bottom: 15px;">
-                Point your phone camera at this QR code
-            </div>
-            <!-- QR Code would be embedded here -->
-        </div>
-        
-        <div class="warning">
-            <h4>⚠️ Installation Requirements</h4>
-            <p>This app requires installation from "Unknown Sources" to be enabled on your Android device.</p>
-        </div>
-        
-        <div class="steps">
-            <h3>📋 Installation Steps</h3>
-            <div class="step">
-                <div class="step-number">1</div>
-                <div>Download the APK file to your Android device</div>
-            </div>
-            <div class="step">
-                <div class="step-number">2</div>
-                <div>Go to Settings > Security > Enable "Unknown Sources"</div>
-            </div>
-            <div class="step">
-                <div class="step-number">3</div>
-                <div>Open the downloaded APK file and tap "Install"</div>
-            </div>
-            <div class="step">
-                <div class="step-number">4</div>
-                <div>Launch {app_name} and start chatting in Malay!</div>
-            </div>
-        </div>
-        
-        <div class="info-section">
-            <h3>ℹ️ App Information</h3>
-            <div class="info-item">
-                <span>Version:</span>
-                <span>{latest_version['version']}</span>
-            </div>
-            <div class="info-item">
-                <span>File Size:</span>
-                <span>{latest_version['file_size'] // 1024 // 1024} MB</span>
-            </div>
-            <div class="info-item">
-                <span>Last Updated:</span>
-                <span>{latest_version['upload_date'][:10]}</span>
-            </div>
-            <div class="info-item">
-                <span>Downloads:</span>
-                <span>{latest_version['download_count']}</span>
-            </div>
-            <div class="info-item">
-                <span>SHA256:</span>
-                <span style="font-family: monospace; font-size: 12px; word-break: break-all;">
-                    {latest_version['file_hash'][:16]}...
-                </span>
-            </div>
-        </div>
-        
-        <div class="info-section">
-            <h3>🇸🇬 About Maya Chatbot</h3>
-            <p>{latest_version.get('description', 'Maya is a friendly Malay chatbot designed to help you practice conversational Bahasa Melayu with Singapore context. Learn greetings, food ordering, family conversations, and more!')}</p>
-        </div>
-    </div>
-    
-    <script>
-        // Track download clicks
-        document.querySelector('.download-btn').addEventListener('click', function() {{
-            // Send analytics (implement according to your backend)
-            console.log('Download started for {app_name} v{latest_version["version"]}');
-        }});
-    </script>
-</body>
-</html>
-        """
+        downloads = (f'<div class="info-item"><span>Downloads:</span>'
+                     f'<span>{latest_version["download_count"]}</span></div>')
+        html_content = render_download_page(app_name, latest_version, styles=inline_styles(),
+                                            extra_info=downloads)
         
-        # Save HTML file
+        # Save HTML file, leaving it untouched when nothing changed
         safe_name = app_name.replace(" ", "_").lower()
         html_filename = f"{safe_name}_download.html"
         html_path = self.qr_codes_dir / html_filename
-        
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        write_if_changed(html_path, html_content.encode('utf-8'))
         
         return str(html_path)
     
+    def build_distribution_site(self, output_dir: str = "site") -> Dict:
+        """Render pages for every app, version and locale; only changed files are written"""
+        with self._lock:
+            data = {"apps": json.loads(json.dumps(self.data["apps"]))}
+        return SiteBuilder(data, qr_cache=self.qr_cache).build(output_dir)
+    
     def create_complete_distribution_package(self, app_name: str, apk_path: str, version: str, description: str = "") -> Dict:
         """Create complete distribution package with APK, QR codes, and HTML page"""
         
@@ -391,9 +413,8 @@ class APKDistributionSystem:
         version_info = self.add_apk(apk_path, app_name, version, description)
         
         # Generate QR codes
-        download_qr = self.generate_qr_code(app_name, version, "download")
-        install_qr = self.generate_qr_code(app_name, version, "install")
-        info_qr = self.generate_qr_code(app_name, version, "info")
+        qr_codes = self.generate_qr_codes([(app_name, version, qr_type) for qr_type in self.QR_TYPES])
+        download_qr, install_qr, info_qr = (qr_codes[(app_name, version, qr_type)] for qr_type in self.QR_TYPES)
         
         # Generate HTML page
         html_page = self.generate_distribution_page(app_name)
@@ -418,8 +439,19 @@ class APKDistributionSystem:
         """Get download analytics"""
         return self.data["analytics"]
     
+    def downloads_between(self, start, end, group_by=None):
+        """
+        Downloads in [start, end) from the hour/day/month rollups.
+        
+        ``group_by``: 'hour' | 'day' | 'month' and/or 'app', 'version',
+        'ua_family', e.g. ('hour', 'version') for an adoption curve.
+        Hourly detail is kept for ``hourly_retention_days``.
+        """
+        with self._lock:
+            return self.rollups.query(start, end, group_by)
+    
     def record_download(self, app_name: str, version: str, user_agent: str = "", ip_address: str = ""):
-        """Record a download event"""
+        """Record a download event (one log append; the summary is rewritten periodically)"""
         download_event = {
             "app_name": app_name,
             "version": version,
@@ -428,8 +460,24 @@ class APKDistributionSystem:
             "ip_address": ip_address
         }
         
-        self.data["downloads"].append(download_event)
+        with self._lock:
+            log_file = self._open_download_log()
+            log_file.write(self._encode_event(download_event))
+            log_file.flush()
+            self.data["event_log_offset"] = log_file.tell()
+            self._apply_download(download_event)
+            
+            self._pending_events += 1
+            if (self._pending_events >= self.compact_every or
+                    time.monotonic() - self._last_compaction >= self.compact_interval):
+                self.compact()
+    
+    def _apply_download(self, download_event: Dict):
+        """Update the summary counters for one download event"""
+        app_name = download_event["app_name"]
+        version = download_event["version"]
         self.data["analytics"]["total_downloads"] += 1
+        self.rollups.add(download_event)
         
         # Update version-specific analytics
         if version not in self.data["analytics"]["downloads_by_version"]:
@@ -442,18 +490,18 @@ class APKDistributionSystem:
             self.data["apps"][app_name]["total_downloads"] += 1
         
         # Update daily analytics
-        today = datetime.now().date().isoformat()
+        today = download_event["timestamp"][:10]
         if today not in self.data["analytics"]["downloads_by_date"]:
             self.data["analytics"]["downloads_by_date"][today] = 0
         self.data["analytics"]["downloads_by_date"][today] += 1
-        
-        self.save_distribution_data()
 
 def main():
     """Example usage of the APK Distribution System"""
     
     # Initialize distribution system
     distributor = APKDistributionSystem("https://maya-chatbot.com")
+    if distributor.migrate_distribution_data():
+        print("🔄 Upgraded distribution_data.json to the current format")
     
     # Example: Add Maya Chatbot APK
     try:
@@ -473,6 +521,10 @@ def main():
         for qr_type, qr_path in package['qr_codes'].items():
             print(f"  {qr_type.title()}: {qr_path}")
         
+        site = distributor.build_distribution_site()
+        print(f"\n🌐 Static site: {len(site['written'])} files updated, "
+              f"{len(site['unchanged'])} unchanged (site/)")
+        
         # Print sharing instructions
         print("\n" + "="*50)
         print("📤 SHARING INSTRUCTIONS")
@@ -12,12 +12,15 @@ import shutil
 import json
 from datetime import datetime
 
+from release_store import BlobStore
+
 class MayaChatbotBuilder:
     def __init__(self):
         self.project_root = Path.cwd()
         self.kivy_dir = self.project_root
         self.react_native_dir = self.project_root / "MalayChatbot"
         self.build_output = self.project_root / "builds"
+        self.release_store = BlobStore(self.project_root / "apk_releases" / "blobs")
         self.version = "1.0.0"
         
         # Create build output directory
@@ -106,9 +109,9 @@ class MayaChatbotBuilder:
             
             if apk_files:
                 apk_path = apk_files[0]
-                # Copy to builds directory
+                # Link into builds directory from the shared release store
                 dest_path = self.build_output / f"maya_chatbot_kivy_v{self.version}.apk"
-                shutil.copy2(apk_path, dest_path)
+                self.release_store.store(apk_path, dest_path)
                 print(f"✅ Kivy APK built: {dest_path}")
                 return dest_path
             else:
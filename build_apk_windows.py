@@ -168,6 +168,12 @@ def update_distribution_with_real_apk():
         print(f"📋 Updated HTML: {package['html_page']}")
         print("🔗 QR codes refreshed with real APK")
         
+        # Drop stored APK builds no version refers to any more
+        garbage = distributor.collect_garbage()
+        if garbage['removed']:
+            print(f"🧹 Removed {len(garbage['removed'])} unused APK build(s), "
+                  f"freed {garbage['bytes_freed'] / (1024 * 1024):.1f} MB")
+        
         return True
         
     except Exception as e:
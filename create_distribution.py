@@ -54,6 +54,12 @@ def main():
         print("   - Print for physical distribution")
         print("4. Users scan QR → Download APK → Install → Use!")
         
+        # Drop stored APK builds no version refers to any more
+        garbage = distributor.collect_garbage()
+        if garbage['removed']:
+            print(f"🧹 Removed {len(garbage['removed'])} unused APK build(s), "
+                  f"freed {garbage['bytes_freed'] / (1024 * 1024):.1f} MB")
+        
         return True
         
     except Exception as e:
@@ -2,11 +2,14 @@
 """
 Create Local QR Codes for Maya Chatbot
 Generates QR codes pointing to localhost:8000 for immediate testing
+(pass --svg for small, scalable SVG codes instead of PNG)
 """
 
-import qrcode
+import sys
 from pathlib import Path
 
+from qr_render import QRCache
+
 def create_local_qr_codes():
     """Create QR codes pointing to local server"""
     print("📱 Creating Local QR Codes for Maya Chatbot...")
@@ -34,26 +37,14 @@ def create_local_qr_codes():
     qr_dir = Path("qr_codes")
     qr_dir.mkdir(exist_ok=True)
     
-    for qr_type, info in qr_codes.items():
-        print(f"🔗 Creating {qr_type} QR code...")
-        
-        # Create QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(info["url"])
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save QR code
-        qr_path = qr_dir / info["filename"]
-        img.save(qr_path)
-        
+    # Render all codes in one batch (cached, so unchanged URLs aren't redrawn)
+    fmt = "svg" if "--svg" in sys.argv else "png"
+    jobs = [{"content": info["url"], "fmt": fmt,
+             "dest": qr_dir / Path(info["filename"]).with_suffix(f".{fmt}")}
+            for info in qr_codes.values()]
+    qr_paths = QRCache().generate(jobs)
+    
+    for info, qr_path in zip(qr_codes.values(), qr_paths):
         print(f"✅ {info['description']}: {qr_path}")
         print(f"   📱 URL: {info['url']}")
     
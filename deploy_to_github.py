@@ -5,23 +5,20 @@ Creates a public internet-accessible version
 """
 
 import os
-import shutil
 import subprocess
 
+from site_builder import build_site, write_if_changed
+from static_assets import build_assets, minify_html
+
 def create_github_deployment():
     """Create GitHub Pages deployment"""
     print("🌐 Creating GitHub Pages Deployment...")
     print("=" * 50)
     
-    # Create docs folder for GitHub Pages
+    # Update the docs folder for GitHub Pages in place: files whose content
+    # is unchanged are left alone, so git only sees (and pushes) real changes
     docs_dir = "docs"
-    if os.path.exists(docs_dir):
-        shutil.rmtree(docs_dir)
-    os.makedirs(docs_dir)
-    
-    # Copy web app
-    shutil.copy("maya_chatbot_webapp.html", f"{docs_dir}/index.html")
-    print("✅ Copied web app as index.html")
+    os.makedirs(docs_dir, exist_ok=True)
     
     # Create a mobile-optimized version
     mobile_html = '''<!DOCTYPE html>
@@ -273,8 +270,13 @@ def create_github_deployment():
 </body>
 </html>'''
     
-    with open(f"{docs_dir}/index.html", "w", encoding="utf-8") as f:
-        f.write(mobile_html)
+    # Publish the page minified, with .gz/.br copies for hosts that serve them
+    minified = minify_html(mobile_html).encode("utf-8")
+    if write_if_changed(f"{docs_dir}/index.html", minified):
+        print(f"✅ Minified index.html: {len(mobile_html.encode('utf-8')):,} → {len(minified):,} bytes")
+    else:
+        print("⏭️  index.html unchanged")
+    build_assets([f"{docs_dir}/index.html"], minify=False)
     
     # Create README for GitHub
     readme_content = '''# Maya Chatbot Melayu 🇸🇬
@@ -311,8 +313,13 @@ A free online Malay chatbot for practicing Bahasa Melayu with Singapore context.
 Made with ❤️ for the Singapore Malay community
 '''
     
-    with open(f"{docs_dir}/README.md", "w") as f:
-        f.write(readme_content)
+    write_if_changed(f"{docs_dir}/README.md", readme_content.encode("utf-8"))
+    
+    # Download pages for every released app version, rebuilt incrementally
+    if os.path.exists("distribution_data.json"):
+        site = build_site(output_dir=f"{docs_dir}/download")
+        print(f"✅ Download pages: {len(site['written'])} updated, {len(site['unchanged'])} unchanged, "
+              f"{len(site['removed'])} removed")
     
     print("✅ Created GitHub Pages structure in /docs")
     print("✅ Created mobile-optimized version")
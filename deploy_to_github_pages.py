@@ -5,9 +5,10 @@ Creates a permanent website URL for your chatbot
 """
 
 import os
-import shutil
 import subprocess
 
+from site_builder import copy_if_changed
+
 def deploy_to_github():
     print("🚀 GitHub Pages Deployment for Maya Chatbot")
     print("=" * 50)
@@ -59,8 +60,10 @@ def deploy_to_github():
     
     # Create index.html from existing webapp
     if os.path.exists('maya_chatbot_webapp.html'):
-        shutil.copy2('maya_chatbot_webapp.html', 'index.html')
-        print("✅ Created index.html (ready for GitHub Pages)")
+        if copy_if_changed('maya_chatbot_webapp.html', 'index.html'):
+            print("✅ Created index.html (ready for GitHub Pages)")
+        else:
+            print("⏭️  index.html already up to date - nothing to upload")
         print("📁 File: index.html")
     else:
         print("❌ maya_chatbot_webapp.html not found")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Download Analytics Rollups
+Hour, day and month download counts broken down by app, version and
+user-agent family, kept up to date one event at a time and queried over
+time ranges without touching raw events.
+"""
+
+import json
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
+
+# Bucket key for each granularity is a prefix of the event's ISO timestamp
+GRANULARITIES = {'month': 7, 'day': 10, 'hour': 13}
+DIMENSIONS = ('app', 'version', 'ua_family')
+
+_UA_FAMILIES = [
+    ('bot', re.compile(r'bot|crawl|spider|slurp|curl|wget|python-requests', re.IGNORECASE)),
+    ('android', re.compile(r'android', re.IGNORECASE)),
+    ('ios', re.compile(r'iphone|ipad|ipod', re.IGNORECASE)),
+    ('windows', re.compile(r'windows', re.IGNORECASE)),
+    ('macos', re.compile(r'macintosh|mac os x', re.IGNORECASE)),
+    ('linux', re.compile(r'linux|x11', re.IGNORECASE)),
+]
+
+
+def user_agent_family(user_agent: str) -> str:
+    """Coarse client family for a User-Agent string"""
+    if not user_agent:
+        return 'unknown'
+    for family, pattern in _UA_FAMILIES:
+        if pattern.search(user_agent):
+            return family
+    return 'other'
+
+
+def _parse_time(value: Union[str, datetime]) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _next_month(t: datetime) -> datetime:
+    return t.replace(year=t.year + 1, month=1) if t.month == 12 else t.replace(month=t.month + 1)
+
+
+def cover_range(start: datetime, end: datetime, finest: str = 'month') -> Iterator[Tuple[str, str]]:
+    """
+    Split [start, end) into the fewest (granularity, bucket key) pairs.
+
+    Whole months are used where they fit, then whole days, then hours at
+    the edges; ``finest`` caps how coarse a bucket may be. The range is
+    widened to whole hours.
+    """
+    t = start.replace(minute=0, second=0, microsecond=0)
+    if end.minute or end.second or end.microsecond:
+        end = end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    allow_month = finest == 'month'
+    allow_day = finest in ('month', 'day')
+    while t < end:
+        if allow_month and t.day == 1 and t.hour == 0 and _next_month(t) <= end:
+            yield 'month', t.strftime('%Y-%m')
+            t = _next_month(t)
+        elif allow_day and t.hour == 0 and t + timedelta(days=1) <= end:
+            yield 'day', t.strftime('%Y-%m-%d')
+            t += timedelta(days=1)
+        else:
+            yield 'hour', t.strftime('%Y-%m-%dT%H')
+            t += timedelta(hours=1)
+
+
+class DownloadRollups:
+    """
+    Incrementally maintained download counts.
+
+    State lives in a plain JSON-serialisable dict,
+    ``{granularity: {bucket: {'["app","version","family"]': count}}}``,
+    so it can be stored inside the distribution summary file.
+    """
+
+    def __init__(self, state: Optional[Dict] = None):
+        self.state = state if state is not None else {}
+        for granularity in GRANULARITIES:
+            self.state.setdefault(granularity, {})
+
+    def add(self, download_event: Dict, count: int = 1):
+        """Count one download event in every granularity"""
+        timestamp = download_event["timestamp"]
+        key = json.dumps([download_event["app_name"], download_event["version"],
+                          user_agent_family(download_event.get("user_agent", ""))],
+                         separators=(',', ':'))
+        for granularity, length in GRANULARITIES.items():
+            bucket = self.state[granularity].setdefault(timestamp[:length], {})
+            bucket[key] = bucket.get(key, 0) + count
+
+    def prune_hours(self, before: datetime):
+        """Drop hourly buckets older than ``before`` (day and month totals are kept)"""
+        cutoff = before.strftime('%Y-%m-%dT%H')
+        hours = self.state['hour']
+        for bucket in [bucket for bucket in hours if bucket < cutoff]:
+            del hours[bucket]
+
+    def query(self, start: Union[str, datetime], end: Union[str, datetime],
+              group_by: Union[str, Sequence[str], None] = None):
+        """
+        Downloads in [start, end), with hour resolution.
+
+        ``group_by`` takes any of 'hour', 'day', 'month' (at most one) and
+        'app', 'version', 'ua_family'. Without it the total is returned;
+        with one field, a {value: count} dict; with several, a dict keyed
+        by tuples in ``group_by`` order.
+        """
+        if isinstance(group_by, str):
+            group_by = (group_by,)
+        group_by = tuple(group_by or ())
+        unknown = [field for field in group_by if field not in GRANULARITIES and field not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown group_by field(s): {', '.join(unknown)}")
+        time_fields = [field for field in group_by if field in GRANULARITIES]
+        if len(time_fields) > 1:
+            raise ValueError("group_by may contain only one of 'hour', 'day', 'month'")
+        finest = time_fields[0] if time_fields else 'month'
+
+        totals = defaultdict(int)
+        for granularity, bucket in cover_range(_parse_time(start), _parse_time(end), finest):
+            counts = self.state[granularity].get(bucket)
+            if not counts:
+                continue
+            for key, count in counts.items():
+                dimensions = dict(zip(DIMENSIONS, json.loads(key)))
+                group = tuple(bucket[:GRANULARITIES[field]] if field in GRANULARITIES else dimensions[field]
+                              for field in group_by)
+                totals[group] += count
+
+        if not group_by:
+            return totals.get((), 0)
+        if len(group_by) == 1:
+            return {group[0]: count for group, count in sorted(totals.items())}
+        return dict(sorted(totals.items()))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Cached File Hashing
+Fast file digests for APKs and other release files. Digests are memoized
+in a small persistent cache keyed by (device, inode, size, mtime_ns), so an
+unchanged file is only ever read once, and batches hash in parallel.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+READ_BUFFER = 1024 * 1024
+
+# Files modified this recently may still change within the same mtime tick
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def digest_file(path, algorithm: str = 'sha256') -> str:
+    """Hash a file without the cache (file_digest, then mmap, then large reads)"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, algorithm).hexdigest()
+        digest = hashlib.new(algorithm)
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        except ValueError:
+            # Empty files can't be mapped
+            pass
+        except OSError:
+            for chunk in iter(lambda: f.read(READ_BUFFER), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+class HashCache:
+    """Persistent digest cache; entries self-invalidate when a file changes"""
+
+    def __init__(self, cache_path='.file_hashes.json', max_entries: int = 10000):
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.cache_path, 'r') as f:
+                self._entries.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _key(stat: os.stat_result, algorithm: str) -> str:
+        return f"{algorithm}:{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def hash_file(self, path, algorithm: str = 'sha256', save: bool = True) -> str:
+        """Digest of ``path``, read from disk only if the file changed"""
+        stat = os.stat(path)
+        key = self._key(stat, algorithm)
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is not None:
+                self._entries.move_to_end(key)
+                return digest
+
+        digest = digest_file(path, algorithm)
+        # Confirm the file didn't change while we read it before caching
+        if self._key(os.stat(path), algorithm) == key and time.time_ns() - stat.st_mtime_ns > RACY_WINDOW_NS:
+            with self._lock:
+                self._entries[key] = digest
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._dirty = True
+            if save:
+                self.save()
+        return digest
+
+    def hash_files(self, paths: Iterable, algorithm: str = 'sha256',
+                   max_workers: Optional[int] = None) -> Dict[str, str]:
+        """Digests for many files, hashed in parallel; unreadable files map to ''"""
+        paths = [str(path) for path in paths]
+
+        def safe_hash(path):
+            try:
+                return self.hash_file(path, algorithm, save=False)
+            except OSError:
+                return ''
+
+        with ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1)) as pool:
+            digests = dict(zip(paths, pool.map(safe_hash, paths)))
+        self.save()
+        return digests
+
+    def save(self):
+        """Write the cache atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._entries)
+            self._dirty = False
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # The cache is only an optimisation
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+# Resolved at import so a later chdir (e.g. into a served directory) can't move it
+DEFAULT_CACHE_PATH = os.path.abspath(os.environ.get('MAYA_HASH_CACHE', '.file_hashes.json'))
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> HashCache:
+    """Process-wide cache stored at $MAYA_HASH_CACHE (default .file_hashes.json)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HashCache(DEFAULT_CACHE_PATH)
+        return _default_cache
+
+
+def hash_file(path, algorithm: str = 'sha256', save: bool = True) -> str:
+    return default_cache().hash_file(path, algorithm, save)
+
+
+def hash_files(paths: Iterable, algorithm: str = 'sha256', max_workers: Optional[int] = None) -> Dict[str, str]:
+    return default_cache().hash_files(paths, algorithm, max_workers)
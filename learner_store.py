@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Persistent Learner Context Store
+Keeps conversation turns, preferences and quiz outcomes per learner in SQLite
+so returning learners can resume where they left off.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    learner_id TEXT NOT NULL,
+    user_text TEXT NOT NULL,
+    bot_text TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turns_learner ON turns (learner_id, id);
+CREATE TABLE IF NOT EXISTS preferences (
+    learner_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (learner_id, key)
+);
+CREATE TABLE IF NOT EXISTS quiz_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    learner_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    question TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quiz_learner ON quiz_results (learner_id, id);
+"""
+
+_STOP = object()
+
+
+class LearnerContextStore:
+    """
+    SQLite (WAL mode) store keyed by learner id.
+
+    Writes are queued and committed in batches by a background thread, reads
+    use their own short-lived connection and only ever fetch one page of rows.
+    """
+
+    def __init__(self, db_path: str = "learner_context.db", batch_size: int = 50,
+                 flush_interval: float = 1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._closed = False
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for concurrent readers and one writer"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+    def _writer_loop(self):
+        """Drain the write queue and commit in batches"""
+        conn = self._connect()
+        try:
+            while True:
+                batch = []
+                stop = False
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        # Flush marker: commit what we have, then signal
+                        self._write_batch(conn, batch)
+                        batch = []
+                        item.set()
+                    else:
+                        batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                self._write_batch(conn, batch)
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[tuple]):
+        """Write a batch of (sql, params) statements in one transaction"""
+        if not batch:
+            return
+        try:
+            with conn:
+                for sql, params in batch:
+                    conn.execute(sql, params)
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not save learner context: {e}")
+
+    def _enqueue(self, sql: str, params: tuple):
+        if self._closed:
+            return
+        self._queue.put((sql, params))
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def record_turn(self, learner_id: str, user_input: str, bot_response: str,
+                    timestamp: str = None):
+        """Queue a conversation turn for saving"""
+        self._enqueue(
+            "INSERT INTO turns (learner_id, user_text, bot_text, timestamp) VALUES (?, ?, ?, ?)",
+            (learner_id, user_input, bot_response, timestamp or datetime.now().isoformat())
+        )
+
+    def set_preference(self, learner_id: str, key: str, value):
+        """Queue a preference update (values are stored as JSON)"""
+        self._enqueue(
+            "INSERT OR REPLACE INTO preferences (learner_id, key, value) VALUES (?, ?, ?)",
+            (learner_id, key, json.dumps(value))
+        )
+
+    def record_quiz_result(self, learner_id: str, category: str, question: str, correct: bool):
+        """Queue a quiz outcome for saving"""
+        self._enqueue(
+            "INSERT INTO quiz_results (learner_id, category, question, correct, timestamp) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (learner_id, category, question, int(bool(correct)), datetime.now().isoformat())
+        )
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far has been committed"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def recent_turns(self, learner_id: str, limit: int = 5) -> List[Dict]:
+        """Get the most recent turns, oldest first"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT user_text, bot_text, timestamp FROM turns WHERE learner_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (learner_id, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{'user': u, 'bot': b, 'timestamp': t} for u, b, t in reversed(rows)]
+
+    def history_page(self, learner_id: str, before_id: Optional[int] = None,
+                     page_size: int = 20) -> List[Dict]:
+        """Get one page of history, newest first, older than before_id"""
+        conn = self._connect()
+        try:
+            if before_id is None:
+                rows = conn.execute(
+                    "SELECT id, user_text, bot_text, timestamp FROM turns WHERE learner_id = ? "
+                    "ORDER BY id DESC LIMIT ?",
+                    (learner_id, page_size)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT id, user_text, bot_text, timestamp FROM turns "
+                    "WHERE learner_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                    (learner_id, before_id, page_size)
+                ).fetchall()
+        finally:
+            conn.close()
+        return [{'id': i, 'user': u, 'bot': b, 'timestamp': t} for i, u, b, t in rows]
+
+    def iter_history(self, learner_id: str, page_size: int = 100) -> Iterator[Dict]:
+        """Iterate over the full history newest first, one page in memory at a time"""
+        before_id = None
+        while True:
+            page = self.history_page(learner_id, before_id, page_size)
+            if not page:
+                return
+            yield from page
+            before_id = page[-1]['id']
+
+    def get_preferences(self, learner_id: str) -> Dict:
+        """Get all stored preferences for a learner"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, value FROM preferences WHERE learner_id = ?", (learner_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {key: json.loads(value) for key, value in rows}
+
+    def quiz_summary(self, learner_id: str) -> Dict:
+        """Get quiz totals per category"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT category, COUNT(*), SUM(correct) FROM quiz_results "
+                "WHERE learner_id = ? GROUP BY category",
+                (learner_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {category: {'attempted': total, 'correct': correct or 0}
+                for category, total, correct in rows}
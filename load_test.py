@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Maya Chatbot - Load Testing Harness
+Replays recorded or synthetic learner sessions against the web app (chat +
+quiz) and APK downloads against the distribution server, all on localhost,
+and reports throughput, latency percentiles and error rates as JSON.
+
+Examples:
+    python load_test.py --target web --learners 200 --concurrency 50
+    python load_test.py --target apk --learners 40 --concurrency 40
+    python load_test.py --target web --trace sessions.jsonl --rate 20
+"""
+
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+SYNTHETIC_MESSAGES = [
+    "hello", "apa khabar", "saya lapar", "saya suka makan laksa", "bagus",
+    "saya belajar bahasa melayu", "chicken rice sedap", "terima kasih", "bye"
+]
+
+
+class Recorder:
+    """Thread-safe collection of per-operation results"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.bytes_received = 0
+        self.job_failures = defaultdict(int)
+
+    def record(self, operation: str, seconds: float, status: int, size: int = 0):
+        with self._lock:
+            self.latencies[operation].append(seconds)
+            self.statuses[operation][status] += 1
+            self.bytes_received += size
+            if status == 0 or status >= 400:
+                self.errors[operation] += 1
+
+    def record_failure(self, error: BaseException):
+        """Count a job that raised instead of finishing its requests"""
+        with self._lock:
+            self.job_failures[type(error).__name__] += 1
+
+    def report(self, elapsed: float) -> Dict:
+        operations = {}
+        total = 0
+        for operation, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            total += len(ordered)
+            operations[operation] = {
+                'requests': len(ordered),
+                'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else 0,
+                'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+                'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+                'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+                'max_ms': round(ordered[-1] * 1000, 2),
+                'error_rate': round(self.errors[operation] / len(ordered), 4),
+                'statuses': {str(code): count for code, count in sorted(self.statuses[operation].items())}
+            }
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'total_requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            'bytes_received': self.bytes_received,
+            'failed_jobs': sum(self.job_failures.values()),
+            'job_failures': dict(sorted(self.job_failures.items())),
+            'operations': operations
+        }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(len(ordered) * pct / 100) - 1)]
+
+
+def timed_request(opener, recorder: Recorder, operation: str, url: str, payload=None):
+    """Make one HTTP request, record it, and return the decoded JSON body (or None)"""
+    data = None
+    headers = {}
+    if payload is not None:
+        data = json.dumps(payload).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    request = urllib.request.Request(url, data=data, headers=headers)
+    start = time.perf_counter()
+    status, body = 0, b''
+    try:
+        with opener.open(request, timeout=30) as response:
+            status = response.status
+            body = response.read()
+    except urllib.error.HTTPError as e:
+        status = e.code
+        body = e.read()
+    except (urllib.error.URLError, OSError):
+        status = 0
+    recorder.record(operation, time.perf_counter() - start, status, len(body))
+    if status == 200 and body[:1] in (b'{', b'['):
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+    return None
+
+
+def load_trace(path: str) -> List[List[Dict]]:
+    """Load recorded sessions: one JSON object per line, {"steps": [...]}
+
+    Each step is {"op": "chat", "message": "..."} or {"op": "quiz", "category": "..."}.
+    """
+    sessions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                sessions.append(json.loads(line)['steps'])
+    return sessions
+
+
+def synthetic_session(rng: random.Random, turns: int = 6, quizzes: int = 2) -> List[Dict]:
+    """A plausible learner session: some chat turns and a couple of quizzes"""
+    steps = [{'op': 'chat', 'message': rng.choice(SYNTHETIC_MESSAGES)} for _ in range(turns)]
+    for _ in range(quizzes):
+        steps.insert(rng.randrange(len(steps) + 1),
+                     {'op': 'quiz', 'category': rng.choice(['keluarga', 'makanan', 'random'])})
+    return steps
+
+
+def run_web_session(base_url: str, steps: List[Dict], recorder: Recorder, rng: random.Random):
+    """Play one learner session with its own cookie jar"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    for step in steps:
+        if step['op'] == 'chat':
+            timed_request(opener, recorder, 'chat', f"{base_url}/chat", {'message': step['message']})
+        elif step['op'] == 'quiz':
+            quiz = timed_request(opener, recorder, 'quiz', f"{base_url}/quiz/{step.get('category', 'random')}")
+            if quiz and 'token' in quiz:
+                timed_request(opener, recorder, 'quiz_check', f"{base_url}/quiz/check",
+                              {'token': quiz['token'], 'selected_index': rng.randrange(len(quiz['options']))})
+
+
+def run_apk_download(base_url: str, apk_name: str, recorder: Recorder):
+    """Download the APK once"""
+    timed_request(urllib.request.build_opener(), recorder, 'apk_download', f"{base_url}/{apk_name}")
+
+
+def start_local_web_server():
+    """Serve web_app_version.app on a free localhost port"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from web_app_version import app
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def start_local_apk_server(directory: str):
+    """Serve ``directory`` with MobileFriendlyHandler on a free localhost port"""
+    from mobile_friendly_server import MobileFriendlyHandler, create_server
+
+    class QuietHandler(MobileFriendlyHandler):
+        def log_message(self, format, *args):
+            pass
+
+    # Same server setup as mobile_friendly_server.main()
+    server = create_server(0, QuietHandler, directory, host='127.0.0.1')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_load(jobs, concurrency: int, rate: float, seed: int, recorder: Recorder):
+    """Run jobs on a pool; with ``rate`` > 0, start them as a Poisson arrival process
+
+    A job that raises is counted as a failed job in ``recorder``.
+    """
+    rng = random.Random(seed)
+    futures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        next_start = time.perf_counter()
+        for job in jobs:
+            if rate > 0:
+                next_start += rng.expovariate(rate)
+                delay = next_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(job))
+    for future in futures:
+        error = future.exception()
+        if error is not None:
+            recorder.record_failure(error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Maya web app and APK server on localhost")
+    parser.add_argument('--target', choices=['web', 'apk', 'both'], default='web')
+    parser.add_argument('--web-url', help="Existing web app URL (default: start one in-process)")
+    parser.add_argument('--apk-url', help="Existing distribution server URL (default: start one in-process)")
+    parser.add_argument('--apk-name', default='maya_chatbot_melayu_v1.0.0.apk')
+    parser.add_argument('--learners', type=int, default=100, help="Sessions (or downloads) to run")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=0, help="Arrivals per second (0 = as fast as possible)")
+    parser.add_argument('--trace', help="JSONL file of recorded sessions to replay")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='load_test_report.json')
+    parser.add_argument('--no-rate-limit', action='store_true',
+                        help="Disable per-client rate limits in the in-process web app")
+    args = parser.parse_args()
+
+    if args.no_rate_limit:
+        # Must be set before web_app_version is imported
+        os.environ['MAYA_RATE_LIMIT'] = os.environ['MAYA_RATE_BURST'] = '1000000'
+
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    servers = []
+    jobs = []
+
+    if args.target in ('web', 'both'):
+        web_url = args.web_url
+        if not web_url:
+            server, web_url = start_local_web_server()
+            servers.append(server)
+        if args.trace:
+            recorded = load_trace(args.trace)
+            sessions = [recorded[i % len(recorded)] for i in range(args.learners)]
+        else:
+            sessions = [synthetic_session(rng) for _ in range(args.learners)]
+        for i, steps in enumerate(sessions):
+            session_rng = random.Random(args.seed + i)
+            jobs.append(lambda steps=steps, session_rng=session_rng:
+                        run_web_session(web_url, steps, recorder, session_rng))
+
+    if args.target in ('apk', 'both'):
+        apk_url = args.apk_url
+        if not apk_url:
+            if not os.path.exists(args.apk_name):
+                print(f"❌ APK file not found: {args.apk_name}")
+                return
+            server, apk_url = start_local_apk_server(os.getcwd())
+            servers.append(server)
+        jobs.extend(lambda: run_apk_download(apk_url, args.apk_name, recorder)
+                    for _ in range(args.learners))
+
+    rng.shuffle(jobs)
+    print(f"🚀 Running {len(jobs)} jobs with concurrency {args.concurrency}...")
+    start = time.perf_counter()
+    run_load(jobs, args.concurrency, args.rate, args.seed, recorder)
+    elapsed = time.perf_counter() - start
+
+    for server in servers:
+        server.shutdown()
+
+    report = recorder.report(elapsed)
+    report['config'] = vars(args)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✅ {report['total_requests']} requests in {report['elapsed_seconds']}s "
+          f"({report['throughput_rps']} req/s)")
+    for operation, stats in report['operations'].items():
+        print(f"   {operation}: p50 {stats['p50_ms']}ms, p95 {stats['p95_ms']}ms, "
+              f"p99 {stats['p99_ms']}ms, errors {stats['error_rate']:.1%}")
+    if report['failed_jobs']:
+        failures = ', '.join(f"{name} x{count}" for name, count in report['job_failures'].items())
+        print(f"❌ {report['failed_jobs']} of {len(jobs)} jobs raised: {failures}")
+    if any('429' in stats['statuses'] for stats in report['operations'].values()) and not args.no_rate_limit:
+        # Each learner's cookie-less first request is charged to 127.0.0.1's shared bucket
+        print("ℹ️  Some requests were rate limited (429); rerun with --no-rate-limit "
+              "or raise MAYA_RATE_LIMIT / MAYA_RATE_BURST to measure raw capacity")
+    print(f"📊 Report saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
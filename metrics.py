@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Metrics for the Maya Web API
+Per-thread counters and fixed-bucket histograms rendered in the
+Prometheus text exposition format for /metrics.
+"""
+
+import math
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _Shard:
+    """One thread's private values"""
+    __slots__ = ('values', '__weakref__')
+
+    def __init__(self):
+        self.values = {}
+
+
+class _PerThreadMetric(ABC):
+    """
+    Base for metrics whose hot path only touches the calling thread's shard.
+
+    Shards are merged when rendering. When a thread exits, its shard is
+    folded into a retired total so short-lived request threads don't leak.
+    """
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards = weakref.WeakSet()
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _values(self) -> Dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.add(shard)
+            weakref.finalize(shard, self._retire, shard.values)
+        return shard.values
+
+    def _retire(self, values: Dict):
+        with self._lock:
+            self._merge(self._retired, values)
+
+    @abstractmethod
+    def _merge(self, into: Dict, values: Dict):
+        """Fold one shard's ``values`` into ``into``"""
+
+    @abstractmethod
+    def _render_samples(self, total: Dict) -> List[str]:
+        """Exposition lines for the merged values"""
+
+    def collect(self) -> Dict:
+        """Merged values across all live and retired threads"""
+        with self._lock:
+            total = {}
+            self._merge(total, self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            self._merge(total, shard.values.copy())
+        return total
+
+    def _label_text(self, labels: Tuple, extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._render_samples(self.collect()))
+        return lines
+
+
+class Counter(_PerThreadMetric):
+    """Monotonic counter"""
+    type_name = 'counter'
+
+    def inc(self, *labels, amount: float = 1.0):
+        values = self._values()
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def _merge(self, into, values):
+        for labels, value in values.items():
+            into[labels] = into.get(labels, 0.0) + value
+
+    def _render_samples(self, total):
+        return [f"{self.name}{self._label_text(labels)} {_format(value)}"
+                for labels, value in sorted(total.items())]
+
+
+class Histogram(_PerThreadMetric):
+    """Fixed-bucket histogram"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        values = self._values()
+        counts = values.get(labels)
+        if counts is None:
+            # Per-bucket counts (non-cumulative), then +Inf, sum
+            counts = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[len(self.buckets)] += 1
+        counts[-1] += value
+
+    def _merge(self, into, values):
+        for labels, counts in values.items():
+            current = into.get(labels)
+            if current is None:
+                into[labels] = list(counts)
+            else:
+                for i, count in enumerate(counts):
+                    current[i] += count
+
+    def _render_samples(self, total):
+        lines = []
+        for labels, counts in sorted(total.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_format(counts[-1])}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose samples are read from a callback at scrape time"""
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict],
+                 labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = labelnames
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        try:
+            samples = self.callback()
+        except Exception:
+            return lines
+        for labels, value in sorted(samples.items()):
+            pairs = ','.join(f'{name}="{_escape(v)}"' for name, v in zip(self.labelnames, labels))
+            lines.append(f"{self.name}{{{pairs}}} {_format(value)}" if pairs
+                         else f"{self.name} {_format(value)}")
+        return lines
+
+
+class CounterCallback(GaugeCallback):
+    """Counter whose running totals are read from a callback at scrape time"""
+    type_name = 'counter'
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()) -> GaugeCallback:
+        return self.register(GaugeCallback(name, documentation, callback, labelnames))
+
+    def counter_callback(self, name, documentation, callback, labelnames=()) -> CounterCallback:
+        return self.register(CounterCallback(name, documentation, callback, labelnames))
+
+    def register_engine_stats(self, prefix: str, engine):
+        """
+        Expose the numeric fields of ``engine.get_statistics()`` as gauges.
+
+        Works with any engine that has get_statistics(), e.g. MalayChatbotCore
+        in the desktop and mobile apps. The web app registers its own
+        MalayChatbotWeb, whose statistics are shared-engine fields only;
+        per-conversation counts live on sessions and are covered by
+        maya_chat_turns_total instead.
+        """
+        def engine_stats():
+            return {(key,): float(value) for key, value in engine.get_statistics().items()
+                    if isinstance(value, (int, float))}
+        return self.gauge(f"{prefix}_engine_stat", "Chat engine statistics from get_statistics()",
+                          engine_stats, ('stat',))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
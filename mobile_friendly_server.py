@@ -4,26 +4,456 @@ Maya Chatbot - Mobile-Friendly Distribution Server
 Handles mobile connections properly with CORS and better error handling
 """
 
+import base64
+import email.utils
+import hashlib
 import http.server
-import socketserver
 import socket
 import os
+import re
+import secrets
+import signal
 import sys
 import threading
 import time
+import urllib.parse
 import webbrowser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+
+from file_hashing import hash_file
+from qr_render import CONTENT_TYPES, FORMATS, QRMemoryCache
+from static_assets import ENCODINGS, build_assets, is_fresh
+from version_catalog import VersionCatalog
+
+# More ranges than this in one request are ignored and the whole file is sent
+MAX_RANGES = 16
+
+def parse_byte_ranges(header, size):
+    """
+    Parse a ``Range: bytes=...`` header against a file of ``size`` bytes.
+
+    Returns sorted, coalesced inclusive (start, end) pairs, an empty list
+    if no range is satisfiable (416), or None if the header should be
+    ignored and the whole file sent.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(','):
+        first, dash, last = part.strip().partition('-')
+        if not dash:
+            return None
+        try:
+            if not first:
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length == 0:
+                    continue
+                start, end = max(0, size - length), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and end < start:
+                    return None
+                end = min(end, size - 1)
+        except ValueError:
+            return None
+        if start < 0:
+            return None
+        if start < size:
+            ranges.append((start, end))
+    if not ranges:
+        return []
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+# Build outputs named like ``app.3f2a9c1b.js`` never change once published
+FINGERPRINTED = re.compile(r'\.[0-9a-f]{8,}\.[A-Za-z0-9]+$')
+
+class ETagCache:
+    """Content-hash ETags and SHA-256 digests, recomputed only when a file's
+    mtime or size changes"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, fs, f):
+        """(etag, sha256 hex) for the open file ``f`` whose stat result is ``fs``"""
+        key = (fs.st_mtime_ns, fs.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        sha256 = self.sha256(path, fs, f)
+        validators = (f'"{sha256[:32]}"', sha256)
+
+        with self._lock:
+            self._entries[path] = (key, validators)
+            self._entries.move_to_end(path)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return validators
+
+    @staticmethod
+    def sha256(path, fs, f):
+        """SHA-256 of the open file, shared with file_hashing's digest cache
+
+        The cache is only read here, never saved: its file may sit in the
+        directory being served.
+        """
+        try:
+            current = os.stat(path)
+        except OSError:
+            current = None
+        if current is not None and (current.st_dev, current.st_ino) == (fs.st_dev, fs.st_ino):
+            return hash_file(path, save=False)
+        # The path was replaced after we opened it; hash the bytes we will send
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+        f.seek(0)
+        return digest.hexdigest()
+
+def accepted_encodings(header):
+    """Map each coding in an ``Accept-Encoding`` header to its q-value"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
 
 class MobileFriendlyHandler(http.server.SimpleHTTPRequestHandler):
+    # Drop clients that stop reading for this long, so they can't pin a worker
+    timeout = 60
+
+    # Cache-Control by kind of file; everything is revalidated with its ETag
+    IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+    HTML_CACHE = 'public, max-age=60, must-revalidate'
+    DEFAULT_CACHE = 'public, no-cache'
+    NO_CACHE = 'no-store'
+
+    etag_cache = ETagCache()
+
+    # Rendered /qr responses, shared by all handler threads
+    qr_cache = QRMemoryCache(int(os.environ.get('MAYA_QR_CACHE_BYTES', 8 * 1024 * 1024)))
+    QR_CACHE = 'public, max-age=86400'
+    MAX_QR_CONTENT = 2048
+
+    # /update-check and /catalog.json, answered from memory
+    version_catalog = VersionCatalog(os.environ.get('MAYA_DISTRIBUTION_DATA', 'distribution_data.json'))
+    UPDATE_CACHE = 'public, max-age=300'
+
+    # Downloads that carry a Repr-Digest header
+    DIGEST_SUFFIXES = ('.apk', '.delta')
+
+    def send_head(self):
+        """Serve files with ETag validation and byte-range (206/416) support"""
+        self._ranges = None
+        self._cache_control = None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split('?', 1)[0].endswith('/'):
+            for index in ('index.html', 'index.htm'):
+                if os.path.isfile(os.path.join(path, index)):
+                    path = os.path.join(path, index)
+                    break
+        if not os.path.isfile(path):
+            # Directories, redirects and 404s are handled as before
+            return super().send_head()
+
+        # Send a prebuilt .br/.gz sibling when the client accepts it
+        ctype = self.guess_type(path)
+        self._cache_control = self.cache_control_for(path)
+        body_path, encoding, has_variants = self.negotiate_encoding(path)
+        try:
+            f = open(body_path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        try:
+            fs = os.fstat(f.fileno())
+            size = fs.st_size
+            etag, sha256 = self.file_validators(body_path, fs, f)
+
+            if self.not_modified(etag, fs.st_mtime):
+                f.close()
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header('ETag', etag)
+                if has_variants:
+                    self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                return None
+
+            ranges = self.requested_ranges(size, etag, fs.st_mtime)
+
+            if ranges == []:
+                f.close()
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+
+            if ranges is None:
+                self.send_response(HTTPStatus.OK)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(size))
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+                self.send_header('Content-Length', str(end - start + 1))
+            else:
+                boundary = secrets.token_hex(16)
+                parts = [(self._part_header(boundary, ctype, start, end, size), start, end)
+                         for start, end in ranges]
+                trailer = f'\r\n--{boundary}--\r\n'.encode('latin-1')
+                length = sum(len(head) + end - start + 1 for head, start, end in parts) + len(trailer)
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-Type', f'multipart/byteranges; boundary={boundary}')
+                self.send_header('Content-Length', str(length))
+                ranges = parts + [(trailer, 0, -1)]
+
+            self._ranges = ranges
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if has_variants:
+                self.send_header('Vary', 'Accept-Encoding')
+            if body_path.endswith(self.DIGEST_SUFFIXES):
+                # Full SHA-256 so installers can verify APKs and patches end to end
+                digest = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+                self.send_header('Repr-Digest', f'sha-256=:{digest}:')
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.date_time_string(fs.st_mtime))
+            self.end_headers()
+            return f
+        except:
+            f.close()
+            raise
+
+    def file_validators(self, path, fs, f):
+        """(ETag, SHA-256 hex) derived from the file's content"""
+        return self.etag_cache.get(path, fs, f)
+
+    def negotiate_encoding(self, path):
+        """Return (file to send, Content-Encoding or None, whether variants exist)"""
+        variants = [(encoding, path + suffix) for encoding, suffix in ENCODINGS.items()
+                    if is_fresh(Path(path), Path(path + suffix))]
+        if not variants:
+            return path, None, False
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+        for encoding, variant in variants:
+            if accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return variant, encoding, True
+        return path, None, True
+
+    def cache_control_for(self, path):
+        name = os.path.basename(path)
+        if FINGERPRINTED.search(name):
+            return self.IMMUTABLE_CACHE
+        if name.endswith(('.html', '.htm')):
+            return self.HTML_CACHE
+        return self.DEFAULT_CACHE
+
+    def etag_matches(self, etag):
+        """True if ``etag`` is listed in If-None-Match (weak comparison: W/"x" matches "x")"""
+        tags = [tag.strip().removeprefix('W/') for tag in self.headers.get('If-None-Match', '').split(',')]
+        return '*' in tags or etag in tags
+
+    def not_modified(self, etag, mtime):
+        """True if the client's cached copy (If-None-Match / If-Modified-Since) is current"""
+        if self.command not in ('GET', 'HEAD'):
+            return False
+        if self.headers.get('If-None-Match'):
+            return self.etag_matches(etag)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return since is not None and int(mtime) <= since.timestamp()
+        return False
+
+    def requested_ranges(self, size, etag, mtime):
+        """Ranges to serve for this request, or None to send the whole file"""
+        header = self.headers.get('Range')
+        if self.command != 'GET' or not header:
+            return None
+        if_range = self.headers.get('If-Range')
+        if if_range and not self._if_range_matches(if_range.strip(), etag, mtime):
+            # The client's partial copy is stale: start over with the full file
+            return None
+        return parse_byte_ranges(header, size)
+
+    @staticmethod
+    def _if_range_matches(if_range, etag, mtime):
+        if if_range.startswith(('"', 'W/')):
+            # Strong comparison only; weak tags never match
+            return if_range == etag
+        try:
+            since = email.utils.parsedate_to_datetime(if_range)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        return since is not None and int(since.timestamp()) == int(mtime)
+
+    @staticmethod
+    def _part_header(boundary, ctype, start, end, size):
+        return (f'\r\n--{boundary}\r\nContent-Type: {ctype}\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n').encode('latin-1')
+
+    def copyfile(self, source, outputfile):
+        """Send file bodies zero-copy with sendfile (falls back to send() when unavailable)"""
+        ranges = getattr(self, '_ranges', None)
+        if ranges is None:
+            self.connection.sendfile(source)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.connection.sendfile(source, start, end - start + 1)
+        else:
+            for head, start, end in ranges:
+                outputfile.write(head)
+                if end >= start:
+                    self.connection.sendfile(source, start, end - start + 1)
+
     def end_headers(self):
         # Add CORS headers for mobile compatibility
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        # Files get a per-type policy in send_head; listings and errors are never cached
+        self.send_header('Cache-Control', getattr(self, '_cache_control', None) or self.NO_CACHE)
         super().end_headers()
 
+    def dynamic_route(self):
+        """Handler for a generated response, or None to serve a file"""
+        return {
+            '/qr': self.send_qr,
+            '/update-check': self.send_update_check,
+            '/catalog.json': self.send_catalog,
+        }.get(urllib.parse.urlsplit(self.path).path)
+
+    def do_GET(self):
+        route = self.dynamic_route()
+        if route:
+            route()
+        else:
+            super().do_GET()
+
+    def do_HEAD(self):
+        route = self.dynamic_route()
+        if route:
+            route()
+        else:
+            super().do_HEAD()
+
+    def send_qr(self):
+        """/qr?url=...&fmt=svg|png - render a QR code on demand"""
+        self._cache_control = None
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        content = query.get('url', [''])[0]
+        fmt = query.get('fmt', ['svg'])[0].lower()
+        if not content or len(content.encode('utf-8')) > self.MAX_QR_CONTENT:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Pass the text to encode as ?url= (up to 2048 bytes)")
+            return
+        if fmt not in FORMATS:
+            self.send_error(HTTPStatus.BAD_REQUEST, "fmt must be svg or png")
+            return
+
+        # The ETag is a hash of the inputs, so revalidation never renders
+        etag = self.qr_cache.etag(content, fmt)
+        self._cache_control = self.QR_CACHE
+        if self.etag_matches(etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        try:
+            body = self.qr_cache.get(content, fmt)
+        except RuntimeError as e:
+            # qrcode (or Pillow for PNG) isn't installed on this machine
+            self._cache_control = None
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+            return
+        except ValueError as e:
+            # Within the byte limit but too dense to encode
+            self._cache_control = None
+            self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPES[fmt])
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_update_check(self):
+        """/update-check?app=<name or slug>&version=<installed version>"""
+        self._cache_control = None
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        app = query.get('app', [''])[0]
+        version = query.get('version', [''])[0]
+        if not app or not version:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Pass ?app= and ?version=")
+            return
+        answer = self.version_catalog.update_check(app, version)
+        if answer is None:
+            self.send_error(HTTPStatus.NOT_FOUND, f"Unknown app: {app}")
+            return
+        self.send_json(*answer)
+
+    def send_catalog(self):
+        """/catalog.json - latest version, hash, size and deltas of every app"""
+        self.send_json(*self.version_catalog.catalog())
+
+    def send_json(self, body, etag):
+        """Send a pre-encoded JSON document, or 304 if the client already has it"""
+        self._cache_control = self.UPDATE_CACHE
+        if self.etag_matches(etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
     def do_OPTIONS(self):
         self.send_response(200)
         self.end_headers()
@@ -33,6 +463,77 @@ class MobileFriendlyHandler(http.server.SimpleHTTPRequestHandler):
         timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
         print(f"📱 [{timestamp}] {client_ip} - {format % args}")
 
+class DistributionServer(http.server.HTTPServer):
+    """
+    HTTP server that handles clients on a bounded worker pool, so one slow
+    phone can't block the rest of the class.
+
+    Connections beyond ``max_connections`` get an immediate 503. Closing
+    the server waits for in-flight downloads to finish.
+    """
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=64, max_connections=256):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='download')
+        self.connection_slots = threading.BoundedSemaphore(max_connections)
+        self.active_connections = 0
+        self._count_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        if not self.connection_slots.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.0 503 Service Unavailable\r\n"
+                                b"Retry-After: 2\r\nContent-Length: 0\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        with self._count_lock:
+            self.active_connections += 1
+        self.executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._count_lock:
+                self.active_connections -= 1
+            self.connection_slots.release()
+
+    def server_close(self):
+        super().server_close()
+        if self.active_connections:
+            print(f"⏳ Waiting for {self.active_connections} download(s) to finish...")
+        self.executor.shutdown(wait=True)
+
+def create_server(port, handler_class=None, directory=None, host=""):
+    """Create a DistributionServer using MAYA_SERVER_* limits from the environment
+    
+    ``host`` defaults to every interface so phones on the LAN can connect.
+    """
+    handler_class = handler_class or MobileFriendlyHandler
+    if directory:
+        import functools
+        handler_class = functools.partial(handler_class, directory=directory)
+    return DistributionServer((host, port), handler_class,
+                              max_workers=int(os.environ.get('MAYA_SERVER_WORKERS', 64)),
+                              max_connections=int(os.environ.get('MAYA_SERVER_MAX_CONNECTIONS', 256)))
+
+def install_shutdown_handler(httpd):
+    """Stop serving gracefully on SIGTERM (Ctrl+C is handled by the caller)"""
+    def handle_sigterm(*args):
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+    try:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except (ValueError, AttributeError):
+        pass
+
 def get_local_ip():
     """Get the computer's local IP address"""
     try:
@@ -93,10 +594,17 @@ def main():
             shutil.copy("bin/maya_chatbot_v1.0.0_real.apk", "maya_chatbot_melayu_v1.0.0.apk")
             print("✅ APK copied from bin folder")
     
+    # Refresh the precompressed .gz/.br pages (skips files that are up to date)
+    built = [result['file'] for result in build_assets() if not result['skipped']]
+    if built:
+        print(f"📦 Precompressed: {', '.join(built)}")
+    
     # Start server
     try:
-        with socketserver.TCPServer(("", PORT), MobileFriendlyHandler) as httpd:
+        with create_server(PORT) as httpd:
+            install_shutdown_handler(httpd)
             print(f"\n🚀 Server starting on all interfaces (0.0.0.0:{PORT})")
+            print(f"👥 Up to {httpd.max_workers} downloads in parallel")
             print("=" * 50)
             print("📱 MOBILE INSTRUCTIONS:")
             print(f"1. Scan QR code or type: http://{local_ip}:{PORT}")
@@ -104,6 +612,8 @@ def main():
             print("3. Make sure phone and computer are on same WiFi network")
             print("\n💻 COMPUTER ACCESS:")
             print(f"Open browser: http://localhost:{PORT}/maya_chatbot_melayu_download.html")
+            print(f"QR for any link: http://localhost:{PORT}/qr?url=<link>&fmt=svg")
+            print(f"Update check: http://localhost:{PORT}/update-check?app=<app>&version=<version>")
             print("\n🛑 Press Ctrl+C to stop server")
             print("=" * 50)
             
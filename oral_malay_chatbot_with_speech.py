@@ -12,6 +12,8 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+from learner_store import LearnerContextStore
+
 # Try to import speech libraries (optional)
 try:
     import pyttsx3
@@ -32,9 +34,15 @@ except ImportError:
 
 class ContextTracker:
     """Simple context tracking for conversation flow"""
-    def __init__(self):
+    def __init__(self, store: Optional[LearnerContextStore] = None, learner_id: str = None):
         self.context_stack = []
         self.max_context = 5
+        self.store = store
+        self.learner_id = learner_id
+        
+        # Resume the last few turns for returning learners
+        if self.store and self.learner_id:
+            self.context_stack = self.store.recent_turns(self.learner_id, self.max_context)
     
     def update_context(self, user_input: str, bot_response: str):
         """Update conversation context"""
@@ -45,6 +53,9 @@ class ContextTracker:
         }
         self.context_stack.append(context_entry)
         
+        if self.store and self.learner_id:
+            self.store.record_turn(self.learner_id, user_input, bot_response, context_entry['timestamp'])
+        
         # Keep only recent context
         if len(self.context_stack) > self.max_context:
             self.context_stack.pop(0)
@@ -133,13 +144,16 @@ class EnhancedSpeechSystem:
             print(f"🔇 Speech thread error: {e}")
 
 class EnhancedMalayChatbot:
-    def __init__(self):
+    def __init__(self, learner_id: str = None, store: Optional[LearnerContextStore] = None):
         self.name = "Maya"
         self.conversation_count = 0
         self.voice_output = False  # Disabled by default to prevent hanging
+        self.learner_id = learner_id
+        self.store = store
+        self.history_cursor = None
         
         # Initialize components
-        self.context_tracker = ContextTracker()
+        self.context_tracker = ContextTracker(store, learner_id)
         self.training_loader = TrainingDataLoader()
         self.speech_system = EnhancedSpeechSystem()
         
@@ -157,6 +171,15 @@ class EnhancedMalayChatbot:
         self.conversation_mood = 'neutral'
         self.last_category = None
         
+        # Restore saved preferences and mood for returning learners
+        if self.store and self.learner_id:
+            saved = self.store.get_preferences(self.learner_id)
+            self.conversation_mood = saved.pop('conversation_mood', 'neutral')
+            self.user_preferences = saved
+            if self.context_tracker.context_stack:
+                # Skip the first-turn greeting when resuming a conversation
+                self.conversation_count = 1
+        
         # Enhanced responses with more variety
         self.responses = {
             'greeting': [
@@ -440,8 +463,11 @@ class EnhancedMalayChatbot:
             food_mentioned = [word for word in user_input.lower().split() if word in ['chicken rice', 'laksa', 'bak chor mee']]
             if food_mentioned:
                 self.user_preferences['favorite_food'] = food_mentioned[0]
+                self.save_preference('favorite_food', food_mentioned[0])
         
         # Update conversation mood
+        if sentiment != self.conversation_mood:
+            self.save_preference('conversation_mood', sentiment)
         self.conversation_mood = sentiment
         
         # Generate contextual response
@@ -452,6 +478,16 @@ class EnhancedMalayChatbot:
         
         return response
 
+    def save_preference(self, key: str, value):
+        """Persist a learner preference if a store is attached"""
+        if self.store and self.learner_id:
+            self.store.set_preference(self.learner_id, key, value)
+    
+    def record_quiz_result(self, category: str, question: str, correct: bool):
+        """Persist a quiz outcome if a store is attached"""
+        if self.store and self.learner_id:
+            self.store.record_quiz_result(self.learner_id, category, question, correct)
+    
     def speak_response(self, text: str):
         """Speak the response if voice output is enabled"""
         if self.voice_output and self.speech_system.speech_available:
@@ -581,6 +617,7 @@ class EnhancedMalayChatbot:
             
             if quiz_type == 'themed':
                 # Handle themed quiz
+                self.record_quiz_result(quiz['theme'], quiz['question'], answer_index == quiz['correct_answer'])
                 if answer_index == quiz['correct_answer']:
                     print("✅ Betul! Correct!")
                     print(f"   💡 {quiz['explanation']}")
@@ -591,6 +628,7 @@ class EnhancedMalayChatbot:
                     print(f"   💡 {quiz['explanation']}")
             else:
                 # Handle vocabulary quiz
+                self.record_quiz_result(quiz['category'], quiz['malay_word'], answer_index == quiz['correct_index'])
                 if answer_index == quiz['correct_index']:
                     print("✅ Betul! Correct!")
                     print(f"   {quiz['malay_word']} = {quiz['correct_answer']}")
@@ -645,6 +683,8 @@ class EnhancedMalayChatbot:
         if self.speech_system.speech_available:
             print("     Type 'voice on/off' to toggle speech output")
         print("     Type 'context' to see conversation history")
+        if self.store:
+            print("     Type 'history' to page through saved history")
         print("     Type 'help' for conversation tips")
         print("     Type 'features' to see new learning features")
         print("     Type 'quiz' to start vocabulary quiz")
@@ -708,6 +748,24 @@ class EnhancedMalayChatbot:
                         print(f"      Maya: {entry['bot']}")
                     continue
                 
+                if user_input.lower() == 'history':
+                    if not self.store or not self.learner_id:
+                        print("📋 Saved history is not enabled")
+                        continue
+                    # Page backwards through saved history, 10 turns per command
+                    self.store.flush()
+                    page = self.store.history_page(self.learner_id, self.history_cursor, 10)
+                    if not page:
+                        print("📋 No older history")
+                        self.history_cursor = None
+                        continue
+                    print(f"\n📋 Saved History ({len(page)} older messages):")
+                    for entry in reversed(page):
+                        print(f"   [{entry['timestamp'][:16]}] You: {entry['user']}")
+                        print(f"      Maya: {entry['bot']}")
+                    self.history_cursor = page[-1]['id']
+                    continue
+                
                 if user_input.lower() in ['voice on', 'voice off']:
                     if not self.speech_system.speech_available:
                         print("🔇 Speech not available. Install with: pip install pyttsx3")
@@ -1355,8 +1413,15 @@ class VocabularyQuiz:
 def main():
     """Main function"""
     print("🚀 Starting Singapore Malay Chatbot...")
-    chatbot = EnhancedMalayChatbot()
-    chatbot.chat()
+    learner_id = os.environ.get('MAYA_LEARNER_ID', 'default')
+    store = LearnerContextStore(os.environ.get('MAYA_LEARNER_DB', 'learner_context.db'))
+    try:
+        chatbot = EnhancedMalayChatbot(learner_id, store)
+        if chatbot.context_tracker.context_stack:
+            print(f"👋 Welcome back, {learner_id}! Resuming your last conversation.")
+        chatbot.chat()
+    finally:
+        store.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
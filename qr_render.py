@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+QR Code Rendering with a Disk Cache
+Renders PNG or compact SVG QR codes, caches each one on disk under a hash
+of everything that affects its pixels, and renders batches of new codes
+on a process pool. The qrcode package (with Pillow for PNG) is optional
+until a code actually has to be drawn.
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import qrcode
+    import qrcode.exceptions
+except ImportError:
+    qrcode = None
+
+# Settings shared by every QR code we publish
+QR_SETTINGS = {'error_level': 'L', 'box_size': 10, 'border': 4}
+FORMATS = ('png', 'svg')
+ERROR_LEVELS = ('L', 'M', 'Q', 'H')
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Below this many cache misses a process pool costs more than it saves
+POOL_THRESHOLD = 4
+
+
+def _make_qr(content: str, error_level: str, box_size: int, border: int):
+    if qrcode is None:
+        raise RuntimeError("QR rendering needs the qrcode package: pip install qrcode[pil]")
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{error_level}"),
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(content)
+    try:
+        qr.make(fit=True)
+    except qrcode.exceptions.DataOverflowError as e:
+        raise ValueError(f"Too much data for one QR code: {e}") from e
+    return qr
+
+
+def _svg(matrix: List[List[bool]]) -> bytes:
+    """One path with a rectangle per horizontal run of dark modules"""
+    commands = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < len(row):
+            if row[x]:
+                start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                commands.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+            else:
+                x += 1
+    size = len(matrix)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+            f'shape-rendering="crispEdges"><rect width="{size}" height="{size}" fill="#fff"/>'
+            f'<path d="{"".join(commands)}"/></svg>').encode('ascii')
+
+
+def render_qr(content: str, fmt: str = 'png', error_level: str = QR_SETTINGS['error_level'],
+              box_size: int = QR_SETTINGS['box_size'], border: int = QR_SETTINGS['border']) -> bytes:
+    """
+    Render one QR code; SVG output is scale-free, so ``box_size`` only affects PNG.
+
+    Raises ValueError for bad settings or content that doesn't fit in a QR code.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"QR format must be one of {', '.join(FORMATS)}")
+    if error_level not in ERROR_LEVELS:
+        raise ValueError(f"QR error level must be one of {', '.join(ERROR_LEVELS)}")
+    qr = _make_qr(content, error_level, box_size, border)
+    if fmt == 'svg':
+        return _svg(qr.get_matrix())
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def qr_cache_key(content: str, fmt: str = 'png', error_level: str = QR_SETTINGS['error_level'],
+                 box_size: int = QR_SETTINGS['box_size'], border: int = QR_SETTINGS['border']) -> str:
+    if fmt == 'svg':
+        box_size = 0
+    raw = '\0'.join([content, fmt, error_level, str(box_size), str(border)])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _render_job(job: Dict) -> bytes:
+    return render_qr(job['content'], job['fmt'], job['error_level'], job['box_size'], job['border'])
+
+
+class QRCache:
+    """Rendered QR codes on disk, named by :func:`qr_cache_key`"""
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or os.environ.get('MAYA_QR_CACHE', '.qr_cache'))
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str, fmt: str) -> Path:
+        return self.directory / f"{key}.{fmt}"
+
+    def _store(self, path: Path, data: bytes):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def get(self, content: str, fmt: str = 'png', **settings) -> Path:
+        """Path of the cached rendering, drawing it first if needed"""
+        job = {**QR_SETTINGS, **settings, 'content': content, 'fmt': fmt}
+        path = self.path_for(qr_cache_key(**job), fmt)
+        if not path.exists():
+            self._store(path, _render_job(job))
+        return path
+
+    def generate(self, jobs: List[Dict], max_workers: Optional[int] = None) -> List[Path]:
+        """
+        Write QR codes for many jobs.
+
+        Each job is {'content', 'dest', optional 'fmt', 'error_level',
+        'box_size', 'border'}. Cache misses render on a process pool; every
+        ``dest`` is then copied from the cache. Returns the dest paths.
+        """
+        jobs = [{**QR_SETTINGS, 'fmt': 'png', **job} for job in jobs]
+        for job in jobs:
+            job['cache_path'] = self.path_for(
+                qr_cache_key(job['content'], job['fmt'], job['error_level'], job['box_size'], job['border']),
+                job['fmt'])
+
+        missing = {}
+        for job in jobs:
+            if not job['cache_path'].exists():
+                missing.setdefault(job['cache_path'], job)
+        if len(missing) >= POOL_THRESHOLD and (max_workers or os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                rendered = pool.map(_render_job, missing.values())
+                for path, data in zip(missing, rendered):
+                    self._store(path, data)
+        else:
+            for path, job in missing.items():
+                self._store(path, _render_job(job))
+
+        written = []
+        for job in jobs:
+            dest = Path(job['dest'])
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(job['cache_path'], dest)
+            written.append(dest)
+        return written
+
+
+class QRMemoryCache:
+    """Size-bounded LRU of rendered QR codes for serving on demand"""
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, settings: Optional[Dict] = None):
+        self.max_bytes = max_bytes
+        self.settings = dict(settings or QR_SETTINGS)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def etag(self, content: str, fmt: str) -> str:
+        """ETag of a rendering, known without drawing it"""
+        return f'"{qr_cache_key(content, fmt, **self.settings)[:32]}"'
+
+    def get(self, content: str, fmt: str = 'svg') -> bytes:
+        key = (content, fmt)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = render_qr(content, fmt, **self.settings)
+        with self._lock:
+            if key not in self._entries and len(data) <= self.max_bytes:
+                self._entries[key] = data
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return data
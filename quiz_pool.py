@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Pre-Generated Quiz Pools
+Keeps a ring of ready-to-send quiz payloads (JSON bytes) per category so
+/quiz/<category> only has to pop one, while a background thread refills.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List
+
+
+class QuizPool:
+    """Per-category rings of pre-serialized quiz payloads"""
+
+    def __init__(self, build: Callable[[str], bytes], categories: List[str], size: int = 64,
+                 low_water: int = 16, max_age: float = 300):
+        self.build = build
+        self.categories = list(categories)
+        self.size = size
+        self.low_water = low_water
+        # Payloads carry expiring tokens, so stale entries are dropped
+        self.max_age = max_age
+        self._rings: Dict[str, deque] = {category: deque(maxlen=size) for category in self.categories}
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_producer(self):
+        """Start the refill thread (again after a fork, since threads don't survive it)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._producer_loop, daemon=True, name='quiz-pool').start()
+
+    def _producer_loop(self):
+        while True:
+            self._refill()
+            self._wakeup.wait(timeout=self.max_age / 2)
+            self._wakeup.clear()
+
+    def _refill(self):
+        """Drop stale payloads and top every ring back up"""
+        cutoff = time.time() - self.max_age
+        for category, ring in self._rings.items():
+            while ring and ring[0][1] < cutoff:
+                try:
+                    ring.popleft()
+                except IndexError:
+                    break
+            while len(ring) < self.size:
+                try:
+                    ring.append((self.build(category), time.time()))
+                except Exception as e:
+                    print(f"⚠️  Could not build quiz for {category}: {e}")
+                    break
+
+    def get(self, category: str) -> bytes:
+        """Pop a ready payload, building one inline if the ring is empty"""
+        self._ensure_producer()
+        ring = self._rings.get(category)
+        if ring is None:
+            return self.build(category)
+
+        cutoff = time.time() - self.max_age
+        payload = None
+        while payload is None:
+            try:
+                payload, created = ring.popleft()
+            except IndexError:
+                break
+            if created < cutoff:
+                payload = None
+
+        if len(ring) < self.low_water:
+            self._wakeup.set()
+        if payload is None:
+            self.misses += 1
+            return self.build(category)
+        self.hits += 1
+        return payload
+
+    def warm(self):
+        """Fill every ring synchronously (e.g. before forking workers)"""
+        self._refill()
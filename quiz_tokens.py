@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Stateless Signed Quiz Tokens
+Lets /quiz/check grade answers without trusting the client and without
+remembering issued quizzes on the server.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from typing import Optional, Tuple
+
+# Upper bound on options so forged tokens cannot force extra HMAC work
+MAX_OPTIONS = 8
+
+
+class QuizTokenError(ValueError):
+    """Raised when a quiz token is malformed, forged or expired"""
+
+
+class QuizTokenSigner:
+    """
+    Issue and verify HMAC-signed quiz tokens.
+
+    The token carries the quiz id, option count, expiry and a nonce in the
+    clear. The correct index is only mixed into the signature, so clients
+    cannot read it; the server recovers it by checking each option.
+    """
+
+    def __init__(self, secret_key: bytes, ttl: int = 600):
+        self.secret_key = secret_key
+        self.ttl = ttl
+
+    def _signature(self, body: str, index: int) -> str:
+        digest = hmac.new(self.secret_key, f"{body}|{index}".encode('utf-8'), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:18]).decode('ascii')
+
+    def issue(self, quiz_id: str, correct_index: int, option_count: int) -> str:
+        """Create a token for one quiz"""
+        expiry = int(time.time()) + self.ttl
+        body = f"{quiz_id}|{option_count}|{expiry}|{secrets.token_hex(4)}"
+        encoded = base64.urlsafe_b64encode(body.encode('utf-8')).decode('ascii').rstrip('=')
+        return f"{encoded}.{self._signature(body, correct_index)}"
+
+    def verify(self, token: str) -> Tuple[str, int]:
+        """Return (quiz_id, correct_index) for a valid token"""
+        try:
+            encoded, signature = token.rsplit('.', 1)
+            body = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+            quiz_id, option_count, expiry, _nonce = body.rsplit('|', 3)
+            option_count, expiry = int(option_count), int(expiry)
+        except (AttributeError, ValueError, UnicodeDecodeError):
+            raise QuizTokenError("Invalid quiz token")
+        if not 0 < option_count <= MAX_OPTIONS:
+            raise QuizTokenError("Invalid quiz token")
+
+        # Check every option so timing does not depend on the answer
+        correct_index = None
+        for index in range(option_count):
+            if hmac.compare_digest(signature, self._signature(body, index)):
+                correct_index = index
+        if correct_index is None:
+            raise QuizTokenError("Invalid quiz token")
+        if expiry < time.time():
+            raise QuizTokenError("Quiz token expired")
+        return quiz_id, correct_index
+
+
+def create_quiz_signer(secret_key: Optional[bytes] = None) -> QuizTokenSigner:
+    """Build a signer using MAYA_QUIZ_TTL from the environment"""
+    return QuizTokenSigner(secret_key or secrets.token_bytes(32),
+                           int(os.environ.get('MAYA_QUIZ_TTL', 600)))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Rate Limiting and Load Shedding for the Maya Web API
+Per-client token buckets with bounded memory, plus a latency-driven load
+shedder that drops optional work before any request is rejected.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Tuple
+
+
+class TokenBucketLimiter:
+    """Token bucket per client key, kept in a size-capped LRU map"""
+
+    def __init__(self, rate: float = 5.0, burst: float = 20.0, max_clients: int = 50000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take ``cost`` tokens; return (allowed, seconds until retry)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                # A forgotten client simply starts again with a full bucket
+                bucket = [self.burst, now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, 0.0
+            return False, (cost - bucket[0]) / self.rate
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+class LoadShedder:
+    """
+    Track recent request latency against an SLO.
+
+    Above the SLO, optional stages (TTS, grammar feedback) are skipped.
+    Only when latency is still far above the SLO are requests rejected.
+    """
+
+    def __init__(self, slo: float = 0.5, window: int = 200, reject_factor: float = 3.0):
+        self.slo = slo
+        self.reject_factor = reject_factor
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._p95 = 0.0
+        self._count = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+            self._count += 1
+            # Recompute the percentile every few requests, not every request
+            if self._count % 20 == 0 or len(self._latencies) < 20:
+                ordered = sorted(self._latencies)
+                self._p95 = ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)]
+
+    @property
+    def p95(self) -> float:
+        return self._p95
+
+    @property
+    def shedding(self) -> bool:
+        """True when optional stages should be skipped"""
+        return self._p95 > self.slo
+
+    @property
+    def overloaded(self) -> bool:
+        """True when even required work should be rejected"""
+        return self._p95 > self.slo * self.reject_factor
+
+
+# Relative cost of each endpoint in bucket tokens
+ENDPOINT_COSTS = {
+    '/chat/batch': 5.0,
+    '/chat/stream': 2.0,
+}
+
+
+def create_rate_limiter() -> TokenBucketLimiter:
+    """Build a limiter from MAYA_RATE_* environment settings"""
+    return TokenBucketLimiter(float(os.environ.get('MAYA_RATE_LIMIT', 5)),
+                              float(os.environ.get('MAYA_RATE_BURST', 20)),
+                              int(os.environ.get('MAYA_RATE_MAX_CLIENTS', 50000)))
+
+
+def create_load_shedder() -> LoadShedder:
+    """Build a shedder from MAYA_LATENCY_SLO_MS"""
+    return LoadShedder(float(os.environ.get('MAYA_LATENCY_SLO_MS', 500)) / 1000)
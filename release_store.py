@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Release Store
+Keeps each distinct APK once, under its SHA-256, and exposes versioned
+filenames as hardlinks (or reflinks/copies where links aren't possible)
+into the store. Blobs no release refers to any more can be collected.
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from file_hashing import hash_file
+
+try:
+    import fcntl
+    FICLONE = 0x40049409  # Linux ioctl: share extents copy-on-write (btrfs, XFS)
+except ImportError:
+    fcntl = None
+
+
+def clone_file(source, destination):
+    """Copy ``source`` as a reflink when the filesystem supports it, else a normal copy"""
+    if fcntl is not None:
+        try:
+            with open(source, 'rb') as src, open(destination, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source, destination)
+            return
+        except OSError:
+            pass
+    shutil.copy2(source, destination)
+
+
+class BlobStore:
+    """SHA-256 keyed blobs stored as ``<root>/<first two hex>/<digest>``"""
+
+    def __init__(self, root='apk_releases/blobs'):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def __contains__(self, digest: str) -> bool:
+        return self.blob_path(digest).is_file()
+
+    def add(self, source) -> Tuple[str, Path]:
+        """Store ``source`` (if its bytes aren't stored yet); return (digest, blob path)"""
+        digest = hash_file(source)
+        blob = self.blob_path(digest)
+        if not blob.is_file():
+            blob.parent.mkdir(exist_ok=True)
+            tmp = blob.with_name(f"{digest}.{os.getpid()}.tmp")
+            # Never hardlink the source itself: a rebuild that rewrites it in
+            # place would silently change the stored blob
+            clone_file(source, tmp)
+            os.replace(tmp, blob)
+        return digest, blob
+
+    def link(self, digest: str, destination) -> Path:
+        """Make ``destination`` a hardlink to the blob (reflink or copy across filesystems)"""
+        blob = self.blob_path(digest)
+        destination = Path(destination)
+        try:
+            if os.path.samefile(blob, destination):
+                return destination
+        except OSError:
+            pass
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            clone_file(blob, tmp)
+        os.replace(tmp, destination)
+        return destination
+
+    def store(self, source, destination) -> str:
+        """Add ``source`` and expose it at ``destination``; return its digest"""
+        digest, _ = self.add(source)
+        self.link(digest, destination)
+        return digest
+
+    def iter_blobs(self) -> Iterable[Tuple[str, Path]]:
+        for blob in self.root.glob('??/*'):
+            if blob.is_file() and not blob.name.endswith('.tmp'):
+                yield blob.name, blob
+
+    def collect_garbage(self, referenced: Iterable[str], dry_run: bool = False) -> Dict:
+        """
+        Delete blobs whose digest is not in ``referenced``.
+
+        A blob that still has other hardlinks (a versioned file somewhere)
+        is kept even if unreferenced, so nothing visible disappears.
+        """
+        referenced = set(referenced)
+        removed, kept_linked, freed = [], [], 0
+        for digest, blob in self.iter_blobs():
+            if digest in referenced:
+                continue
+            stat = blob.stat()
+            if stat.st_nlink > 1:
+                kept_linked.append(digest)
+                continue
+            removed.append(digest)
+            freed += stat.st_size
+            if not dry_run:
+                blob.unlink()
+        return {'removed': removed, 'kept_linked': kept_linked, 'bytes_freed': freed}
@@ -272,10 +272,11 @@ def validate_json_data(data: dict) -> bool:
         """Create secure data storage implementation"""
         storage_code = '''
 import json
-import hashlib
 import base64
 from typing import Dict, Any
 
+from file_hashing import hash_file, hash_files
+
 class SecureStorage:
     """
     Secure storage for chatbot data with basic encryption
@@ -326,14 +327,14 @@ class SecureStorage:
     
     def calculate_file_integrity(self, filepath: str) -> str:
         """Calculate file hash for integrity checking"""
-        sha256_hash = hashlib.sha256()
         try:
-            with open(filepath, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(chunk)
-            return sha256_hash.hexdigest()
+            return hash_file(filepath)
         except:
             return ""
+    
+    def calculate_files_integrity(self, filepaths: list) -> Dict[str, str]:
+        """Hash several files in parallel ("" for unreadable files)"""
+        return hash_files(filepaths)
 '''
         
         with open("secure_storage.py", "w") as f:
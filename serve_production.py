@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Maya Malay Chatbot - Pre-fork Production Server
+Loads the chatbot data once in a master process, freezes it out of the
+garbage collector, then forks worker processes that share those memory
+pages copy-on-write and accept connections from one listening socket.
+
+Configuration (environment):
+    MAYA_WORKERS         number of worker processes (default: CPU count)
+    MAYA_WORKER_THREADS  run each worker threaded (default: 1 = yes)
+    MAYA_HOST, PORT      listen address (default: 0.0.0.0:5000)
+Each worker also gets MAYA_WORKER_ID (0..N-1) in its environment.
+
+Sessions are shared between workers through SQLite, but the rate limiter,
+load shedder and metrics live in each worker's memory:
+  - MAYA_RATE_LIMIT / MAYA_RATE_BURST are a whole-server budget; each worker
+    enforces 1/N of it. The kernel spreads a client's connections across
+    workers, so the total stays close to the configured value (a client
+    pinned to one keep-alive connection gets 1/N).
+  - Each worker sheds load on its own recent latency.
+  - /metrics is the view of whichever worker answered. Each scrape includes
+    maya_worker{worker="<id>"} so they can be told apart; counters must be
+    summed across workers.
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+shutting_down = False
+
+
+def load_app(workers: int):
+    """Import the web app in the master so its data is shared by all workers"""
+    if workers > 1:
+        # In-process sessions would be split between workers; share them via
+        # SQLite, whose per-turn BEGIN IMMEDIATE transaction keeps concurrent
+        # turns on one session from losing updates across processes
+        os.environ.setdefault('MAYA_SESSION_BACKEND', 'sqlite')
+    import web_app_version
+    from rate_limit import ENDPOINT_COSTS
+
+    if workers > 1:
+        split_rate_limits(web_app_version.rate_limiter, workers, max(ENDPOINT_COSTS.values(), default=1.0))
+    web_app_version.metrics.gauge('maya_worker', 'Pre-fork worker that served this scrape',
+                                  lambda: {(os.environ.get('MAYA_WORKER_ID', '0'),): 1}, ('worker',))
+
+    # Build everything workers would otherwise build lazily
+    web_app_version.quiz_pool.warm()
+    web_app_version.app.url_map.update()
+
+    # Move everything allocated so far into the permanent generation so GC
+    # passes in the workers never touch (and so never copy) these pages
+    gc.collect()
+    gc.freeze()
+    return web_app_version.app
+
+
+def split_rate_limits(limiter, workers: int, max_cost: float):
+    """Give each worker its 1/N share of the configured per-client budget"""
+    limiter.rate /= workers
+    # Keep every endpoint affordable from a full bucket
+    limiter.burst = max(limiter.burst / workers, max_cost)
+
+
+def run_worker(app, listen_socket: socket.socket, worker_id: int, threaded: bool):
+    """Serve requests on the inherited socket until told to stop
+
+    werkzeug's server is used on purpose: it is already a dependency of the
+    app and can serve an inherited socket. The pre-forking, preloading and
+    shared-socket accept done here are what a gunicorn deployment would add.
+    """
+    from werkzeug.serving import make_server
+
+    os.environ['MAYA_WORKER_ID'] = str(worker_id)
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    host, port = listen_socket.getsockname()[:2]
+    server = make_server(host, port, app, threaded=threaded, fd=listen_socket.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def spawn_worker(app, listen_socket, worker_id, threaded) -> int:
+    pid = os.fork()
+    if pid == 0:
+        run_worker(app, listen_socket, worker_id, threaded)
+    return pid
+
+
+def main():
+    if not hasattr(os, 'fork'):
+        print("❌ Pre-fork mode needs a POSIX system. Use: python web_app_version.py")
+        return
+
+    workers = int(os.environ.get('MAYA_WORKERS', os.cpu_count() or 1))
+    threaded = os.environ.get('MAYA_WORKER_THREADS', '1') != '0'
+    host = os.environ.get('MAYA_HOST', '0.0.0.0')
+    port = int(os.environ.get('PORT', 5000))
+
+    print("🌐 Starting Maya Malay Chatbot (production)...")
+    app = load_app(workers)
+
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen_socket.bind((host, port))
+    listen_socket.listen(1024)
+    listen_socket.set_inheritable(True)
+
+    children = {}
+    for worker_id in range(workers):
+        children[spawn_worker(app, listen_socket, worker_id, threaded)] = worker_id
+    print(f"✅ {workers} workers listening on http://{host}:{port}")
+    if workers > 1:
+        print("ℹ️  Rate limits are split across workers; /metrics shows one worker per scrape")
+
+    def stop(*args):
+        global shutting_down
+        shutting_down = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Supervise: restart workers that die, until asked to stop
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        worker_id = children.pop(pid, None)
+        if worker_id is not None and not shutting_down:
+            print(f"⚠️  Worker {worker_id} exited (status {status}), restarting")
+            time.sleep(0.5)
+            children[spawn_worker(app, listen_socket, worker_id, threaded)] = worker_id
+
+    listen_socket.close()
+    print("👋 Server stopped")
+
+
+if __name__ == '__main__':
+    main()
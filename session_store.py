@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Per-User Session Store for the Maya Web App
+Keeps a compact conversation state per browser session, keyed by a signed
+cookie, with LRU + TTL eviction and in-process or SQLite backends.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+
+class ChatSession:
+    """Compact per-session conversation state"""
+    __slots__ = ('conversation_count', 'context_stack', 'last_seen', 'lock')
+
+    def __init__(self, conversation_count: int = 0, context_stack: list = None,
+                 last_seen: float = None):
+        self.conversation_count = conversation_count
+        # Entries are (user, bot, timestamp) tuples to keep sessions small
+        self.context_stack = context_stack or []
+        self.last_seen = last_seen or time.time()
+        self.lock = threading.Lock()
+
+    def to_json(self) -> str:
+        return json.dumps([self.conversation_count, self.context_stack])
+
+    @classmethod
+    def from_json(cls, raw: str, last_seen: float = None) -> 'ChatSession':
+        count, context = json.loads(raw)
+        return cls(count, [tuple(entry) for entry in context], last_seen)
+
+
+class MemorySessionBackend:
+    """In-process session map with LRU + TTL eviction"""
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 1800):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[ChatSession]:
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(sid)
+            if session is None:
+                return None
+            if now - session.last_seen > self.ttl:
+                del self._sessions[sid]
+                return None
+            session.last_seen = now
+            self._sessions.move_to_end(sid)
+            return session
+
+    def put(self, sid: str, session: ChatSession):
+        with self._lock:
+            self._sessions[sid] = session
+            self._sessions.move_to_end(sid)
+            self._evict()
+
+    @contextmanager
+    def transaction(self, sid: str):
+        """
+        Yield (session, found) with the session locked for a read-modify-write.
+
+        Sessions are shared objects here, so concurrent requests for one sid
+        get the same instance and serialize on its lock.
+        """
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(sid)
+            found = session is not None and now - session.last_seen <= self.ttl
+            if not found:
+                session = self._sessions[sid] = ChatSession()
+            session.last_seen = now
+            self._sessions.move_to_end(sid)
+            self._evict()
+        with session.lock:
+            yield session, found
+
+    def _evict(self):
+        """Drop expired sessions from the cold end, then enforce the size cap"""
+        cutoff = time.time() - self.ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionBackend:
+    """SQLite-backed sessions shared between worker processes"""
+
+    def __init__(self, db_path: str = "web_sessions.db", max_sessions: int = 100000,
+                 ttl: float = 1800):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._local = threading.local()
+        self._puts = 0
+        self._puts_lock = threading.Lock()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "sid TEXT PRIMARY KEY, state TEXT NOT NULL, last_seen REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_seen ON sessions (last_seen)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (and per process, after a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, sid: str) -> Optional[ChatSession]:
+        row = self._conn().execute(
+            "SELECT state, last_seen FROM sessions WHERE sid = ?", (sid,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return ChatSession.from_json(row[0])
+
+    def put(self, sid: str, session: ChatSession):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, state, last_seen) VALUES (?, ?, ?)",
+                (sid, session.to_json(), time.time())
+            )
+        self._count_put()
+
+    @contextmanager
+    def transaction(self, sid: str):
+        """
+        Yield (session, found) inside a BEGIN IMMEDIATE transaction.
+
+        The write lock is held from the read until the updated state is
+        stored, so concurrent turns on one sid (from any thread or worker
+        process) run one after another instead of overwriting each other.
+        Nothing is stored if the block raises.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT state, last_seen FROM sessions WHERE sid = ?", (sid,)
+            ).fetchone()
+            found = row is not None and time.time() - row[1] <= self.ttl
+            session = ChatSession.from_json(row[0]) if found else ChatSession()
+            yield session, found
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, state, last_seen) VALUES (?, ?, ?)",
+                (sid, session.to_json(), time.time())
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        self._count_put()
+
+    def _count_put(self):
+        """Evict every 500 writes (counted across this process's threads)"""
+        with self._puts_lock:
+            self._puts += 1
+            due = self._puts % 500 == 0
+        if due:
+            self._evict()
+
+    def _evict(self):
+        """Delete expired sessions and trim to the size cap"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE last_seen < ?", (time.time() - self.ttl,))
+            conn.execute(
+                "DELETE FROM sessions WHERE sid IN (SELECT sid FROM sessions "
+                "ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            )
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class SessionManager:
+    """Issue and verify signed session cookies and load their state"""
+    cookie_name = 'maya_sid'
+
+    def __init__(self, backend=None, secret_key: bytes = None):
+        # Not `backend or ...`: an empty backend has len() 0 and is falsy
+        self.backend = backend if backend is not None else MemorySessionBackend()
+        self.secret_key = secret_key or os.environ.get('MAYA_SECRET_KEY', '').encode() or secrets.token_bytes(32)
+
+    def _sign(self, sid: str) -> str:
+        return hmac.new(self.secret_key, sid.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def make_cookie(self, sid: str) -> str:
+        return f"{sid}.{self._sign(sid)}"
+
+    def issue_cookie(self) -> str:
+        """Signed cookie for a brand-new session id"""
+        return self.make_cookie(secrets.token_urlsafe(16))
+
+    def verify_cookie(self, cookie: Optional[str]) -> Optional[str]:
+        """Return the session id if the cookie signature is valid"""
+        if not cookie or '.' not in cookie:
+            return None
+        sid, signature = cookie.rsplit('.', 1)
+        if hmac.compare_digest(signature, self._sign(sid)):
+            return sid
+        return None
+
+    def load(self, cookie: Optional[str]):
+        """Return (sid, session, is_new) for a request cookie"""
+        sid = self.verify_cookie(cookie)
+        if sid:
+            session = self.backend.get(sid)
+            if session is not None:
+                return sid, session, False
+        else:
+            sid = secrets.token_urlsafe(16)
+        session = ChatSession()
+        return sid, session, True
+
+    def save(self, sid: str, session: ChatSession):
+        self.backend.put(sid, session)
+
+    @contextmanager
+    def transaction(self, cookie: Optional[str]):
+        """
+        Yield (sid, session, is_new) for a request cookie and save on exit.
+
+        Use this instead of load()/save() for anything that changes the
+        session: the backend keeps concurrent requests for the same sid
+        from interleaving their read-modify-write.
+        """
+        sid = self.verify_cookie(cookie)
+        if not sid:
+            sid = secrets.token_urlsafe(16)
+        with self.backend.transaction(sid) as (session, found):
+            yield sid, session, not found
+
+
+def create_session_manager() -> SessionManager:
+    """Build a session manager from MAYA_SESSION_* environment settings"""
+    ttl = float(os.environ.get('MAYA_SESSION_TTL', 1800))
+    max_sessions = int(os.environ.get('MAYA_SESSION_MAX', 10000))
+    if os.environ.get('MAYA_SESSION_BACKEND', 'memory') == 'sqlite':
+        backend = SQLiteSessionBackend(os.environ.get('MAYA_SESSION_DB', 'web_sessions.db'),
+                                       max_sessions, ttl)
+    else:
+        backend = MemorySessionBackend(max_sessions, ttl)
+    return SessionManager(backend)
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Incremental Static Distribution Site
+Renders a download page for every app, every version and every locale from
+distribution_data.json, using a template compiled once at import. Assets
+(the stylesheet, QR codes) get content-fingerprinted names so servers can
+cache them forever. A build manifest records each output file's SHA-256,
+and only files whose content changed are written (with .gz/.br siblings),
+so rebuilds and uploads touch just the deltas.
+
+Usage:
+    python site_builder.py [OUTPUT_DIR]      # default: site/
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from qr_render import QRCache
+from static_assets import ENCODINGS, compress_variants
+from version_catalog import build_catalog, encode
+
+MANIFEST_NAME = '.site-manifest.json'
+DEFAULT_LOCALE = 'en'
+
+# Text content types that get precompressed siblings
+COMPRESSIBLE = ('.html', '.css', '.svg', '.json')
+
+_FIELD = re.compile(r'\{\{\s*(\w+)(\|raw)?\s*\}\}')
+
+
+class Template:
+    """
+    A ``{{ field }}`` template parsed once into literal/field pairs.
+
+    Fields are HTML-escaped unless written ``{{ field|raw }}``.
+    """
+
+    def __init__(self, source: str):
+        self.parts = []
+        position = 0
+        for match in _FIELD.finditer(source):
+            self.parts.append((source[position:match.start()], match.group(1), bool(match.group(2))))
+            position = match.end()
+        self.tail = source[position:]
+
+    def render(self, context: Dict) -> str:
+        out = []
+        for literal, field, raw in self.parts:
+            out.append(literal)
+            value = str(context[field])
+            out.append(value if raw else html.escape(value))
+        out.append(self.tail)
+        return ''.join(out)
+
+
+SITE_CSS = """
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    max-width: 600px;
+    margin: 0 auto;
+    padding: 20px;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    color: white;
+}
+a { color: white; }
+.container {
+    background: rgba(255, 255, 255, 0.1);
+    backdrop-filter: blur(10px);
+    border-radius: 20px;
+    padding: 30px;
+    box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
+    border: 1px solid rgba(255, 255, 255, 0.18);
+}
+.language { text-align: right; font-size: 14px; }
+.app-icon {
+    width: 80px;
+    height: 80px;
+    background: #4CAF50;
+    border-radius: 16px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-size: 36px;
+    margin: 0 auto 20px;
+}
+.app-title {
+    font-size: 28px;
+    font-weight: bold;
+    text-align: center;
+    margin-bottom: 10px;
+}
+.app-version {
+    text-align: center;
+    opacity: 0.8;
+    margin-bottom: 30px;
+}
+.download-section {
+    background: rgba(255, 255, 255, 0.1);
+    border-radius: 15px;
+    padding: 20px;
+    margin: 20px 0;
+    text-align: center;
+}
+.download-btn {
+    background: #4CAF50;
+    color: white;
+    padding: 15px 30px;
+    border: none;
+    border-radius: 25px;
+    font-size: 18px;
+    font-weight: bold;
+    text-decoration: none;
+    display: inline-block;
+    margin: 10px;
+    box-shadow: 0 4px 15px 0 rgba(76, 175, 80, 0.3);
+    transition: all 0.3s ease;
+}
+.download-btn:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 6px 20px 0 rgba(76, 175, 80, 0.4);
+}
+.qr-code {
+    background: white;
+    padding: 20px;
+    border-radius: 15px;
+    margin: 20px 0;
+    text-align: center;
+}
+.qr-code h4 { color: #333; margin-bottom: 15px; }
+.qr-code p { color: #666; font-size: 14px; margin-bottom: 15px; }
+.qr-code img {
+    max-width: 200px;
+    height: auto;
+}
+.info-section {
+    background: rgba(255, 255, 255, 0.1);
+    border-radius: 15px;
+    padding: 20px;
+    margin: 20px 0;
+}
+.info-item {
+    display: flex;
+    justify-content: space-between;
+    margin: 10px 0;
+    padding: 10px 0;
+    border-bottom: 1px solid rgba(255, 255, 255, 0.1);
+}
+.hash { font-family: monospace; font-size: 12px; word-break: break-all; }
+.warning {
+    background: rgba(255, 152, 0, 0.2);
+    border: 1px solid rgba(255, 152, 0, 0.5);
+    border-radius: 10px;
+    padding: 15px;
+    margin: 20px 0;
+}
+.steps {
+    background: rgba(255, 255, 255, 0.1);
+    border-radius: 15px;
+    padding: 20px;
+    margin: 20px 0;
+}
+.step {
+    display: flex;
+    align-items: center;
+    margin: 15px 0;
+}
+.step-number {
+    background: #4CAF50;
+    color: white;
+    width: 30px;
+    height: 30px;
+    border-radius: 50%;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-weight: bold;
+    margin-right: 15px;
+}
+"""
+
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="{{ lang }}">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{{ app_name }} - {{ t_download }}</title>
+{{ styles|raw }}
+</head>
+<body>
+<div class="container">
+{{ language_links|raw }}
+<div class="app-icon">🇸🇬</div>
+<h1 class="app-title">{{ app_name }}</h1>
+<p class="app-version">{{ t_version }} {{ version }}</p>
+<div class="download-section">
+<h3>📱 {{ t_download_apk }}</h3>
+<a href="{{ download_url }}" class="download-btn">⬇️ {{ t_download_apk }} ({{ size_mb }} MB)</a>
+</div>
+<div class="qr-code">
+<h4>📱 {{ t_scan_qr }}</h4>
+<p>{{ t_point_camera }}</p>
+{{ qr_image|raw }}
+</div>
+<div class="warning">
+<h4>⚠️ {{ t_requirements }}</h4>
+<p>{{ t_requirements_text }}</p>
+</div>
+<div class="steps">
+<h3>📋 {{ t_steps }}</h3>
+<div class="step"><div class="step-number">1</div><div>{{ t_step1 }}</div></div>
+<div class="step"><div class="step-number">2</div><div>{{ t_step2 }}</div></div>
+<div class="step"><div class="step-number">3</div><div>{{ t_step3 }}</div></div>
+<div class="step"><div class="step-number">4</div><div>{{ t_step4 }}</div></div>
+</div>
+<div class="info-section">
+<h3>ℹ️ {{ t_app_info }}</h3>
+<div class="info-item"><span>{{ t_version }}:</span><span>{{ version }}</span></div>
+<div class="info-item"><span>{{ t_file_size }}:</span><span>{{ size_mb }} MB</span></div>
+<div class="info-item"><span>{{ t_last_updated }}:</span><span>{{ upload_date }}</span></div>
+{{ extra_info|raw }}
+<div class="info-item"><span>SHA256:</span><span class="hash">{{ file_hash }}...</span></div>
+</div>
+<div class="info-section">
+<h3>🇸🇬 {{ t_about }}</h3>
+<p>{{ description }}</p>
+</div>
+{{ version_list|raw }}
+</div>
+</body>
+</html>
+""")
+
+INDEX_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="{{ lang }}">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{{ t_site_title }}</title>
+{{ styles|raw }}
+</head>
+<body>
+<div class="container">
+{{ language_links|raw }}
+<div class="app-icon">🇸🇬</div>
+<h1 class="app-title">{{ t_site_title }}</h1>
+<div class="info-section">
+{{ app_list|raw }}
+</div>
+</div>
+</body>
+</html>
+""")
+
+STRINGS = {
+    'en': {
+        'language_name': 'English',
+        'site_title': 'Maya Chatbot Downloads',
+        'download': 'Download',
+        'download_apk': 'Download APK',
+        'version': 'Version',
+        'scan_qr': 'Scan QR Code to Download',
+        'point_camera': 'Point your phone camera at this QR code',
+        'requirements': 'Installation Requirements',
+        'requirements_text': 'This app requires installation from "Unknown Sources" to be enabled on your Android device.',
+        'steps': 'Installation Steps',
+        'step1': 'Download the APK file to your Android device',
+        'step2': 'Go to Settings > Security > Enable "Unknown Sources"',
+        'step3': 'Open the downloaded APK file and tap "Install"',
+        'step4': 'Launch {app_name} and start chatting in Malay!',
+        'app_info': 'App Information',
+        'file_size': 'File Size',
+        'last_updated': 'Last Updated',
+        'downloads': 'Downloads',
+        'about': 'About Maya Chatbot',
+        'description': ('Maya is a friendly Malay chatbot designed to help you practice conversational '
+                        'Bahasa Melayu with Singapore context. Learn greetings, food ordering, family '
+                        'conversations, and more!'),
+        'all_versions': 'All Versions',
+        'latest': 'latest',
+    },
+    'ms': {
+        'language_name': 'Bahasa Melayu',
+        'site_title': 'Muat Turun Maya Chatbot',
+        'download': 'Muat Turun',
+        'download_apk': 'Muat Turun APK',
+        'version': 'Versi',
+        'scan_qr': 'Imbas Kod QR untuk Muat Turun',
+        'point_camera': 'Halakan kamera telefon anda ke kod QR ini',
+        'requirements': 'Keperluan Pemasangan',
+        'requirements_text': 'Aplikasi ini memerlukan pemasangan daripada "Sumber Tidak Diketahui" '
+                             'diaktifkan pada peranti Android anda.',
+        'steps': 'Langkah Pemasangan',
+        'step1': 'Muat turun fail APK ke peranti Android anda',
+        'step2': 'Pergi ke Tetapan > Keselamatan > Aktifkan "Sumber Tidak Diketahui"',
+        'step3': 'Buka fail APK yang dimuat turun dan tekan "Pasang"',
+        'step4': 'Lancarkan {app_name} dan mula berbual dalam Bahasa Melayu!',
+        'app_info': 'Maklumat Aplikasi',
+        'file_size': 'Saiz Fail',
+        'last_updated': 'Kemas Kini Terakhir',
+        'downloads': 'Muat Turun',
+        'about': 'Tentang Maya Chatbot',
+        'description': ('Maya ialah chatbot Bahasa Melayu yang mesra untuk membantu anda berlatih '
+                        'perbualan dengan konteks Singapura. Belajar ucapan, memesan makanan, '
+                        'perbualan keluarga dan banyak lagi!'),
+        'all_versions': 'Semua Versi',
+        'latest': 'terkini',
+    },
+}
+
+
+def slug(app_name: str) -> str:
+    """Filename-safe app name, as used for versioned APK filenames"""
+    return app_name.replace(" ", "_").lower()
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    """``site.css`` -> ``site.<first 10 hex of sha256>.css``"""
+    stem, dot, suffix = name.rpartition('.')
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{dot}{suffix}"
+
+
+def _strings(locale: str, app_name: str = '') -> Dict:
+    strings = STRINGS[locale]
+    return {f"t_{key}": value.replace('{app_name}', app_name) for key, value in strings.items()}
+
+
+def render_download_page(app_name: str, version_info: Dict, locale: str = DEFAULT_LOCALE,
+                         styles: str = '', qr_image: str = '', extra_info: str = '',
+                         version_list: str = '', language_links: str = '') -> str:
+    """One version's download page; the raw arguments are ready-made HTML"""
+    strings = _strings(locale, app_name)
+    return PAGE_TEMPLATE.render(dict(
+        strings,
+        lang=locale,
+        app_name=app_name,
+        version=version_info['version'],
+        download_url=version_info['download_url'],
+        size_mb=f"{version_info['file_size'] / (1024 * 1024):.1f}",
+        upload_date=version_info.get('upload_date', '')[:10],
+        file_hash=version_info['file_hash'][:16],
+        description=version_info.get('description') or strings['t_description'],
+        styles=styles,
+        qr_image=qr_image,
+        extra_info=extra_info,
+        version_list=version_list,
+        language_links=language_links,
+    ))
+
+
+def inline_styles() -> str:
+    """The site stylesheet as a <style> block, for standalone pages"""
+    return f"<style>{SITE_CSS}</style>"
+
+
+class SiteBuilder:
+    """Renders the distribution site in memory and writes only what changed"""
+
+    def __init__(self, data: Dict, locales=None, qr_cache: Optional[QRCache] = None):
+        self.data = data
+        self.locales = list(locales or STRINGS)
+        self.qr_cache = qr_cache
+
+    @staticmethod
+    def _page_path(locale: str, *parts: str) -> str:
+        prefix = [] if locale == DEFAULT_LOCALE else [locale]
+        return '/'.join(prefix + list(parts) + ['index.html'])
+
+    @staticmethod
+    def _relative(from_path: str, to_path: str) -> str:
+        return '../' * from_path.count('/') + to_path
+
+    def _qr_asset(self, content: str, files: Dict[str, bytes]) -> Optional[str]:
+        if self.qr_cache is None:
+            try:
+                self.qr_cache = QRCache()
+            except OSError:
+                return None
+        try:
+            data = self.qr_cache.get(content, 'svg').read_bytes()
+        except (RuntimeError, OSError):
+            # Pages still build without the optional qrcode package
+            return None
+        name = f"assets/{fingerprint('qr.svg', data)}"
+        files[name] = data
+        return name
+
+    def _language_links(self, locale: str, page_path: str, parts) -> str:
+        links = []
+        for other in self.locales:
+            if other == locale:
+                continue
+            href = self._relative(page_path, self._page_path(other, *parts))
+            links.append(f'<a href="{html.escape(href)}">{html.escape(STRINGS[other]["language_name"])}</a>')
+        return f'<p class="language">{" · ".join(links)}</p>' if links else ''
+
+    def render(self) -> Dict[str, bytes]:
+        """Every site file, keyed by its path relative to the site root"""
+        files = {}
+        css = SITE_CSS.encode('utf-8')
+        css_path = f"assets/{fingerprint('site.css', css)}"
+        files[css_path] = css
+
+        # Static copy of the server's /catalog.json for hosts without it
+        files['catalog.json'] = encode(build_catalog(self.data))[0]
+
+        apps = self.data.get('apps', {})
+        qr_paths = {}
+        for app_name, app in apps.items():
+            for version, info in app['versions'].items():
+                qr_paths[(app_name, version)] = self._qr_asset(info['download_url'], files)
+
+        for locale in self.locales:
+            strings = STRINGS[locale]
+            index_path = self._page_path(locale)
+            app_items = []
+            for app_name, app in sorted(apps.items()):
+                name = slug(app_name)
+                latest = app['latest_version']
+                ordered = sorted(app['versions'].values(), key=lambda info: info.get('upload_date', ''),
+                                 reverse=True)
+                href = self._relative(index_path, self._page_path(locale, name))
+                app_items.append(f'<div class="info-item"><a href="{html.escape(href)}">'
+                                 f'{html.escape(app_name)}</a><span>{html.escape(latest)}</span></div>')
+
+                # The version list only differs by how deep the page is
+                version_lists = {}
+                pages = [((name,), app['versions'][latest])]
+                pages += [((name, info['version']), info) for info in ordered]
+                for parts, info in pages:
+                    page_path = self._page_path(locale, *parts)
+                    depth = page_path.count('/')
+                    if depth not in version_lists:
+                        version_links = []
+                        for other in ordered:
+                            label = html.escape(other['version'])
+                            if other['version'] == latest:
+                                label += f" ({html.escape(strings['latest'])})"
+                            other_href = self._relative(page_path, self._page_path(locale, name, other['version']))
+                            version_links.append(f'<div class="info-item"><a href="{html.escape(other_href)}">'
+                                                 f'{label}</a><span>{html.escape(other.get("upload_date", "")[:10])}'
+                                                 f'</span></div>')
+                        version_lists[depth] = (f'<div class="info-section"><h3>{html.escape(strings["all_versions"])}'
+                                                f'</h3>{"".join(version_links)}</div>')
+                    qr_path = qr_paths.get((app_name, info['version']))
+                    qr_image = (f'<img src="{html.escape(self._relative(page_path, qr_path))}" alt="QR">'
+                                if qr_path else '')
+                    files[page_path] = render_download_page(
+                        app_name, info, locale,
+                        styles=f'<link rel="stylesheet" href="{self._relative(page_path, css_path)}">',
+                        qr_image=qr_image,
+                        version_list=version_lists[depth],
+                        language_links=self._language_links(locale, page_path, parts),
+                    ).encode('utf-8')
+
+            files[index_path] = INDEX_TEMPLATE.render(dict(
+                _strings(locale),
+                lang=locale,
+                styles=f'<link rel="stylesheet" href="{self._relative(index_path, css_path)}">',
+                language_links=self._language_links(locale, index_path, ()),
+                app_list=''.join(app_items),
+            )).encode('utf-8')
+        return files
+
+    def build(self, output_dir='site') -> Dict[str, List[str]]:
+        """
+        Bring ``output_dir`` up to date with the current data.
+
+        Returns {'written': [...], 'unchanged': [...], 'removed': [...]}
+        with paths relative to ``output_dir``; ``written`` is exactly what
+        a deploy needs to upload.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = output_dir / MANIFEST_NAME
+        try:
+            with open(manifest_path, 'r') as f:
+                previous = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            previous = {}
+
+        files = self.render()
+        manifest = {}
+        result = {'written': [], 'unchanged': [], 'removed': []}
+        for relative, data in sorted(files.items()):
+            digest = hashlib.sha256(data).hexdigest()
+            manifest[relative] = digest
+            target = output_dir / relative
+            if previous.get(relative) == digest and target.is_file():
+                result['unchanged'].append(relative)
+                continue
+            write_file(target, data)
+            if target.suffix in COMPRESSIBLE:
+                for encoding, body in compress_variants(data).items():
+                    write_file(Path(str(target) + ENCODINGS[encoding]), body)
+            result['written'].append(relative)
+
+        for relative in sorted(set(previous) - set(manifest)):
+            for suffix in ('',) + tuple(ENCODINGS.values()):
+                try:
+                    os.remove(output_dir / (relative + suffix))
+                except OSError:
+                    pass
+            result['removed'].append(relative)
+
+        if result['written'] or result['removed'] or not manifest_path.exists():
+            write_file(manifest_path, json.dumps({'files': manifest}, indent=1, sort_keys=True).encode('utf-8'))
+        return result
+
+
+def write_file(path, data: bytes):
+    """Atomically replace ``path`` with ``data``"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_if_changed(path, data: bytes) -> bool:
+    """Write ``data`` unless ``path`` already holds exactly it; True if written"""
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    write_file(path, data)
+    return True
+
+
+def copy_if_changed(source, destination) -> bool:
+    """Copy ``source`` over ``destination`` only if the contents differ"""
+    destination = Path(destination)
+    try:
+        if destination.stat().st_size == os.path.getsize(source) and \
+                destination.read_bytes() == Path(source).read_bytes():
+            return False
+    except OSError:
+        pass
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(source, destination)
+    return True
+
+
+def build_site(data_path='distribution_data.json', output_dir='site') -> Dict[str, List[str]]:
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+    return SiteBuilder(data).build(output_dir)
+
+
+def main():
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else 'site'
+    if not os.path.exists('distribution_data.json'):
+        print("❌ distribution_data.json not found - add an APK first")
+        sys.exit(1)
+    result = build_site(output_dir=output_dir)
+    print(f"✅ Site built in {output_dir}/: {len(result['written'])} written, "
+          f"{len(result['unchanged'])} unchanged, {len(result['removed'])} removed")
+    for relative in result['written']:
+        print(f"   📝 {relative}")
+
+
+if __name__ == '__main__':
+    main()
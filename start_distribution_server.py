@@ -4,14 +4,14 @@ Local Distribution Server for Maya Chatbot
 Starts a web server to test QR codes and distribution
 """
 
-import http.server
-import socketserver
 import webbrowser
 import os
 from pathlib import Path
 import threading
 import time
 
+from mobile_friendly_server import create_server, install_shutdown_handler
+
 def start_server():
     """Start local web server for distribution testing"""
     
@@ -23,13 +23,9 @@ def start_server():
     
     PORT = 8000
     
-    class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-        def end_headers(self):
-            self.send_header('Access-Control-Allow-Origin', '*')
-            super().end_headers()
-    
     try:
-        with socketserver.TCPServer(("", PORT), CustomHTTPRequestHandler) as httpd:
+        with create_server(PORT) as httpd:
+            install_shutdown_handler(httpd)
             server_url = f"http://localhost:{PORT}"
             download_page = f"{server_url}/maya_chatbot_melayu_download.html"
             
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Maya Chatbot - Precompressed Static Assets
+Minifies the HTML pages and writes .gz (and .br, when the brotli module is
+installed) siblings next to them, so servers can send the compressed bytes
+directly instead of compressing on every request.
+
+Usage:
+    python static_assets.py                  # default pages
+    python static_assets.py page.html ...    # specific files
+"""
+
+import gzip
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_PAGES = ['index.html', 'maya_chatbot_webapp.html', 'maya_chatbot_melayu_download.html']
+
+# Content-Encoding -> sibling file suffix, in server preference order
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+# Blocks whose contents are copied (script/style get their own light pass)
+_RAW_BLOCK = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)',
+                        re.IGNORECASE | re.DOTALL)
+_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_WHITESPACE = re.compile(r'\s+')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,])\s*')
+
+
+def _collapse_whitespace(match) -> str:
+    # Keep a line break where there was one so inline spacing never changes
+    return '\n' if '\n' in match.group(0) else ' '
+
+
+def _minify_markup(text: str) -> str:
+    text = _COMMENT.sub('', text)
+    return _WHITESPACE.sub(_collapse_whitespace, text)
+
+
+def _minify_css(text: str) -> str:
+    text = _CSS_COMMENT.sub('', text)
+    text = _WHITESPACE.sub(' ', text)
+    return _CSS_PUNCTUATION.sub(r'\1', text).strip()
+
+
+def _minify_js(text: str) -> str:
+    """Drop indentation and blank lines, leaving multi-line template literals alone"""
+    lines = []
+    in_template = False
+    for line in text.split('\n'):
+        if not in_template:
+            line = line.strip()
+            if line:
+                lines.append(line)
+        else:
+            lines.append(line)
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines)
+
+
+def minify_html(html: str) -> str:
+    """Conservatively minify an HTML page (comments, indentation, CSS whitespace)"""
+    parts = []
+    position = 0
+    for match in _RAW_BLOCK.finditer(html):
+        parts.append(_minify_markup(html[position:match.start()]))
+        opening, tag, body, closing = match.groups()
+        tag = tag.lower()
+        if tag == 'style':
+            body = _minify_css(body)
+        elif tag == 'script':
+            body = _minify_js(body)
+        parts.append(_WHITESPACE.sub(' ', opening) + body + closing)
+        position = match.end()
+    parts.append(_minify_markup(html[position:]))
+    return ''.join(parts).strip() + '\n'
+
+
+def compress_variants(data: bytes) -> Dict[str, bytes]:
+    """Encoded bodies keyed by Content-Encoding"""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return variants
+
+
+def is_fresh(path: Path, sibling: Path) -> bool:
+    """True if ``sibling`` was built from the current ``path``"""
+    try:
+        return sibling.stat().st_mtime_ns >= path.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def build_asset(path, minify: bool = True, in_place: bool = False, force: bool = False) -> Dict:
+    """
+    Write compressed siblings of ``path`` (minified first for HTML).
+
+    With ``in_place``, the minified page also replaces the original; use
+    that only on build output such as the docs/ deploy folder.
+    """
+    path = Path(path)
+    suffixes = [ENCODINGS[encoding] for encoding in ENCODINGS
+                if encoding != 'br' or brotli is not None]
+    if not force and not in_place and all(is_fresh(path, Path(str(path) + s)) for s in suffixes):
+        return {'file': str(path), 'skipped': True}
+
+    data = path.read_bytes()
+    original_size = len(data)
+    if minify and path.suffix.lower() in ('.html', '.htm'):
+        data = minify_html(data.decode('utf-8')).encode('utf-8')
+    if in_place:
+        path.write_bytes(data)
+
+    sizes = {'original': original_size, 'minified': len(data)}
+    for encoding, body in compress_variants(data).items():
+        sibling = Path(str(path) + ENCODINGS[encoding])
+        tmp = sibling.with_name(sibling.name + '.tmp')
+        tmp.write_bytes(body)
+        os.replace(tmp, sibling)
+        sizes[encoding] = len(body)
+    return {'file': str(path), 'skipped': False, 'sizes': sizes}
+
+
+def build_assets(paths: List = None, **kwargs) -> List[Dict]:
+    """Build every existing file in ``paths`` (default: the web app pages)"""
+    return [build_asset(path, **kwargs) for path in (paths or DEFAULT_PAGES) if Path(path).is_file()]
+
+
+def main():
+    args = sys.argv[1:]
+    force = '--force' in args
+    paths = [arg for arg in args if arg != '--force']
+
+    print("📦 Building precompressed static assets...")
+    if brotli is None:
+        print("ℹ️  brotli not installed - writing .gz only (pip install brotli for .br)")
+    for result in build_assets(paths or None, force=force):
+        if result['skipped']:
+            print(f"   ⏭️  {result['file']} (up to date)")
+            continue
+        sizes = result['sizes']
+        encoded = ', '.join(f"{encoding} {sizes[encoding]:,}" for encoding in ENCODINGS if encoding in sizes)
+        print(f"   ✅ {result['file']}: {sizes['original']:,} → minified {sizes['minified']:,} → {encoded} bytes")
+
+
+if __name__ == '__main__':
+    main()
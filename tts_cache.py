@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Cached Text-to-Speech Audio for the Maya Web App
+Renders Malay replies to MP3 once with gTTS and serves them as static files.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Optional
+
+# Try to import gTTS (optional)
+try:
+    from gtts import gTTS
+    GTTS_AVAILABLE = True
+except ImportError:
+    GTTS_AVAILABLE = False
+
+
+class TTSCache:
+    """Disk cache of rendered speech keyed by a hash of the text"""
+
+    def __init__(self, directory: str = "static/audio", url_prefix: str = "/static/audio",
+                 language: str = "ms"):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.language = language
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    @property
+    def available(self) -> bool:
+        return GTTS_AVAILABLE
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.language}:{text}".encode('utf-8')).hexdigest()[:24]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def cached_url(self, text: str) -> Optional[str]:
+        """Return the audio URL if it has already been rendered"""
+        key = self._key(text)
+        if os.path.exists(self._path(key)):
+            return f"{self.url_prefix}/{key}.mp3"
+        return None
+
+    def get_url(self, text: str) -> Optional[str]:
+        """Return the audio URL, rendering it first if needed (blocking)"""
+        url = self.cached_url(text)
+        if url or not self.available:
+            return url
+
+        key = self._key(text)
+        # Only one thread renders a given text; others wait for it
+        with self._lock:
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+        if not owner:
+            event.wait(timeout=30)
+            return self.cached_url(text)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            gTTS(text=text, lang=self.language).save(tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            print(f"🔇 Speech error: {e}")
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+        return self.cached_url(text)
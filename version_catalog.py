@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Version Catalog and Update Checks
+Condenses distribution_data.json into what an installed app needs to know:
+each app's latest version, its SHA-256 and size, and which older versions
+can update with a delta patch. VersionCatalog keeps that in memory, reloads
+it only when the data file changes, and hands out pre-encoded update-check
+answers with their ETags, so a poll is a dictionary lookup.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+CATALOG_FORMAT = 1
+
+_VERSION_NUMBER = re.compile(r'\d+')
+
+
+def build_catalog(data: Dict) -> Dict:
+    """Compact catalog: {'format', 'apps': {app name: latest release summary}}"""
+    apps = {}
+    for app_name, app in sorted(data.get("apps", {}).items()):
+        latest = app["versions"].get(app.get("latest_version"))
+        if latest is None:
+            continue
+        apps[app_name] = {
+            "slug": app_name.replace(" ", "_").lower(),
+            "latest_version": latest["version"],
+            "sha256": latest["file_hash"],
+            "size": latest["file_size"],
+            "url": latest["download_url"],
+            "deltas": {base: {"url": delta["download_url"], "sha256": delta["file_hash"],
+                              "size": delta["file_size"]}
+                       for base, delta in sorted(latest.get("deltas", {}).items())},
+        }
+    return {"format": CATALOG_FORMAT, "apps": apps}
+
+
+def encode(document: Dict) -> Tuple[bytes, str]:
+    """Canonical JSON body and its strong ETag"""
+    body = json.dumps(document, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def parse_version(version: str) -> Tuple[int, ...]:
+    """Numeric parts of a version string, e.g. '1.10.0-beta2' -> (1, 10, 0, 2)"""
+    parts = [int(part) for part in _VERSION_NUMBER.findall(version)]
+    # 1.2 and 1.2.0 are the same release
+    while parts and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def update_answer(app_name: str, entry: Dict, version: str) -> Dict:
+    """
+    What a device running ``version`` of the app should do.
+
+    Only strictly older versions are offered an update; beta or sideloaded
+    builds newer than the catalog, and unparseable versions, are left alone.
+    """
+    installed = parse_version(version)
+    update = bool(installed) and installed < parse_version(entry["latest_version"])
+    delta = entry["deltas"].get(version) if update else None
+    return {
+        "app": app_name,
+        "version": version,
+        "latest_version": entry["latest_version"],
+        "update_available": update,
+        "url": entry["url"] if update else None,
+        "sha256": entry["sha256"] if update else None,
+        "size": entry["size"] if update else None,
+        "delta": delta,
+    }
+
+
+class VersionCatalog:
+    """In-memory catalog of ``data_path``, refreshed when the file changes"""
+
+    def __init__(self, data_path='distribution_data.json', check_interval: float = 1.0):
+        # Absolute, so a later chdir (start_distribution_server does one) can't break it
+        self.data_path = os.path.abspath(data_path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._next_check = 0.0
+        # (apps by name and slug, released versions, encoded catalog, answer cache),
+        # swapped as a whole so readers never mix two generations
+        self._state = ({}, {}, encode(build_catalog({})), {})
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                stat = os.stat(self.data_path)
+            except OSError:
+                signature = None
+            else:
+                signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return
+            data = {}
+            if signature is not None:
+                try:
+                    with open(self.data_path, 'r') as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    # Mid-write or corrupt: keep serving the last good catalog
+                    return
+            catalog = build_catalog(data)
+            apps = {}
+            for app_name, entry in catalog["apps"].items():
+                apps[app_name] = apps[entry["slug"]] = (app_name, entry)
+            known_versions = {app_name: set(app["versions"])
+                              for app_name, app in data.get("apps", {}).items()}
+            self._state = (apps, known_versions, encode(catalog), {})
+            self._signature = signature
+
+    def catalog(self) -> Tuple[bytes, str]:
+        """The whole catalog as (body, etag)"""
+        self._refresh()
+        return self._state[2]
+
+    def update_check(self, app: str, version: str) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) answering an update check, or None for an unknown app"""
+        self._refresh()
+        apps, known_versions, _, answers = self._state
+        found = apps.get(app)
+        if found is None:
+            return None
+        app_name, entry = found
+        key = (app_name, version)
+        answer = answers.get(key)
+        if answer is None:
+            answer = encode(update_answer(app_name, entry, version))
+            # Only released versions are cached, so junk queries can't grow the map
+            if version in known_versions.get(app_name, ()):
+                answers[key] = answer
+        return answer
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Maya Malay Chatbot - Async (ASGI) Web API
+Serves the same /chat, /chat/batch, /chat/stream, /quiz/<category> and
+/quiz/check contract as web_app_version.py, but as a plain ASGI app so one
+process can hold many open connections.
+
+Run with:  uvicorn web_app_asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from web_app_version import (admit_request, format_sse, handle_chat_batch,
+                             handle_chat_bytes, handle_chat_stream, handle_quiz_bytes,
+                             handle_quiz_check, identify_client, metrics, record_request,
+                             sessions, tts_cache)
+
+# Anything that may block (session load/save, engine work, TTS, file reads)
+# runs here so it never stalls the event loop. Only the in-memory quiz pool
+# is called directly.
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('MAYA_ASGI_THREADS', 8)),
+                              thread_name_prefix='maya-slow')
+
+MAX_BODY_SIZE = 64 * 1024
+
+
+async def offload(func, *args):
+    """Run a blocking call on the slow-path thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, func, *args)
+
+
+def get_cookie(scope, name):
+    """Read one cookie value from the request headers"""
+    for key, value in scope['headers']:
+        if key == b'cookie':
+            cookie = SimpleCookie()
+            cookie.load(value.decode('latin-1'))
+            if name in cookie:
+                return cookie[name].value
+    return None
+
+
+async def read_json(receive):
+    """Read and decode a JSON object request body"""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if len(body) > MAX_BODY_SIZE:
+            raise ValueError("Request body too large")
+    data = json.loads(body or b'{}')
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    return data
+
+
+async def send_json(send, payload, status=200, headers=None):
+    """Send a complete JSON response"""
+    body = json.dumps(payload).encode('utf-8')
+    response_headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+    ]
+    response_headers.extend(headers or [])
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def session_cookie(scope):
+    """The request's session cookie, as verified or issued by app()"""
+    return scope['maya.session_cookie']
+
+
+def session_cookie_header(cookie):
+    """Build the Set-Cookie header for a newly issued session"""
+    value = f"{sessions.cookie_name}={cookie}; HttpOnly; Path=/; SameSite=Lax"
+    return (b'set-cookie', value.encode('latin-1'))
+
+
+async def chat(scope, receive, send):
+    data = await read_json(receive)
+    body, new_cookie = await offload(handle_chat_bytes, data.get('message', ''),
+                                     session_cookie(scope))
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+    ]
+    if new_cookie:
+        headers.append(session_cookie_header(new_cookie))
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def chat_batch(scope, receive, send):
+    data = await read_json(receive)
+    payload, new_cookie = await offload(handle_chat_batch, data.get('messages'),
+                                        session_cookie(scope))
+    headers = [session_cookie_header(new_cookie)] if new_cookie else []
+    status = 200 if payload['status'] == 'success' else 400
+    await send_json(send, payload, status=status, headers=headers)
+
+
+async def chat_stream(scope, receive, send):
+    """Stream a chat reply as Server-Sent Events
+    
+    Audio and grammar stages run concurrently on the thread pool and are
+    sent in whichever order they finish.
+    """
+    if scope['method'] == 'POST':
+        data = await read_json(receive)
+    else:
+        data = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode()).items()}
+    include_grammar = str(data.get('grammar', '')).lower() in ('1', 'true', 'yes')
+    ready_events, slow_stages, new_cookie = await offload(
+        handle_chat_stream, data.get('message', ''), session_cookie(scope), include_grammar)
+    
+    headers = [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]
+    if new_cookie:
+        headers.append(session_cookie_header(new_cookie))
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    
+    async def send_event(event, event_data):
+        await send({'type': 'http.response.body',
+                    'body': format_sse(event, event_data).encode('utf-8'), 'more_body': True})
+    
+    for event, event_data in ready_events:
+        await send_event(event, event_data)
+    
+    async def run_stage(event, stage):
+        try:
+            return event, await offload(stage), None
+        except Exception as e:
+            return event, None, e
+    
+    for finished in asyncio.as_completed([run_stage(event, stage) for event, stage in slow_stages]):
+        event, result, error = await finished
+        if error is not None:
+            await send_event('error', {'stage': event, 'message': str(error)})
+        elif result is not None:
+            await send_event(event, result)
+    
+    await send_event('done', {'status': 'success'})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def send_audio(send, filename):
+    """Serve a cached TTS file"""
+    path = os.path.join(tts_cache.directory, os.path.basename(filename))
+    if not filename.endswith('.mp3') or not os.path.isfile(path):
+        await send_json(send, {'status': 'error', 'message': 'Not found'}, status=404)
+        return
+    body = await offload(read_file, path)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'audio/mpeg'),
+        (b'content-length', str(len(body)).encode()),
+        (b'cache-control', b'public, max-age=31536000, immutable'),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def quiz(scope, receive, send, category):
+    body = handle_quiz_bytes(category)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def check_quiz(scope, receive, send):
+    data = await read_json(receive)
+    result = await offload(handle_quiz_check, data)
+    await send_json(send, result, status=400 if result.get('status') == 'error' else 200)
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    method = scope['method']
+    start_time = time.perf_counter()
+    status = [500]
+
+    client = scope.get('client') or ('', 0)
+    key, cookie, issued = identify_client(get_cookie(scope, sessions.cookie_name), client[0])
+    scope = dict(scope, **{'maya.session_cookie': cookie})
+
+    async def send_with_status(message):
+        if message['type'] == 'http.response.start':
+            status[0] = message['status']
+            if issued and not any(name == b'set-cookie' for name, _ in message['headers']):
+                message = dict(message, headers=[*message['headers'], session_cookie_header(cookie)])
+        await send(message)
+
+    rejection = admit_request(path, key)
+    try:
+        if rejection:
+            payload, retry_after = rejection
+            retry_header = (b'retry-after', str(max(1, math.ceil(retry_after))).encode())
+            await send_json(send_with_status, payload, status=429, headers=[retry_header])
+        else:
+            await route(scope, receive, send_with_status, path, method)
+    finally:
+        record_request(path, status[0], time.perf_counter() - start_time)
+
+
+async def route(scope, receive, send, path, method):
+    """Dispatch an admitted request"""
+    try:
+        if path == '/chat' and method == 'POST':
+            await chat(scope, receive, send)
+        elif path == '/chat/batch' and method == 'POST':
+            await chat_batch(scope, receive, send)
+        elif path == '/chat/stream' and method in ('GET', 'POST'):
+            await chat_stream(scope, receive, send)
+        elif path == '/metrics' and method == 'GET':
+            body = metrics.render().encode('utf-8')
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', METRICS_CONTENT_TYPE.encode()),
+                (b'content-length', str(len(body)).encode()),
+            ]})
+            await send({'type': 'http.response.body', 'body': body})
+        elif path.startswith(tts_cache.url_prefix + '/') and method == 'GET':
+            await send_audio(send, path[len(tts_cache.url_prefix) + 1:])
+        elif path == '/quiz/check' and method == 'POST':
+            await check_quiz(scope, receive, send)
+        elif path.startswith('/quiz/') and method == 'GET':
+            await quiz(scope, receive, send, path[len('/quiz/'):])
+        else:
+            await send_json(send, {'status': 'error', 'message': 'Not found'}, status=404)
+    except (ValueError, json.JSONDecodeError):
+        await send_json(send, {'status': 'error', 'message': 'Invalid request'}, status=400)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn not found. Install with: pip install uvicorn")
+    else:
+        print("🌐 Starting Maya Malay Chatbot async API...")
+        print("💻 Access locally: http://localhost:5000")
+        uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -5,12 +5,30 @@ A web-based version that works on all mobile devices through browsers.
 Can be installed as a Progressive Web App (PWA).
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, g
+import math
 import random
+import time
+import re
 import json
 import os
 from datetime import datetime
 
+# Try to import orjson for faster serialization (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from session_store import create_session_manager
+from quiz_tokens import QuizTokenError, create_quiz_signer
+from quiz_pool import QuizPool
+from rate_limit import ENDPOINT_COSTS, create_load_shedder, create_rate_limiter
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from tts_cache import TTSCache
+from oral_malay_chatbot_with_speech import GrammarChecker
+
 app = Flask(__name__)
 
 class MalayChatbotWeb:
@@ -87,40 +105,102 @@ class MalayChatbotWeb:
             'food': ['makan', 'makanan', 'lapar', 'chicken rice', 'laksa', 'sedap'],
             'goodbye': ['bye', 'selamat tinggal', 'goodbye']
         }
+        
+        # Pre-encoded /chat bodies for every known reply, built once
+        self._response_json = {
+            (malay, english): self.encode_response(malay, english)
+            for options in self.responses.values()
+            for malay, english in options
+        }
+        
+        # Word lists per quiz category, built once
+        self._quiz_word_lists = {
+            category: (list(data['words'].keys()), list(data['words'].values()))
+            for category, data in self.word_categories.items()
+        }
+        
+        # Pre-compiled keyword patterns, one alternation per category
+        self._keyword_patterns = [
+            (category, re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+            for category, keywords in self.keywords.items()
+        ]
     
     def get_response_category(self, user_input):
         """Determine response category"""
         user_lower = user_input.lower()
-        for category, keywords in self.keywords.items():
-            if any(keyword in user_lower for keyword in keywords):
+        for category, pattern in self._keyword_patterns:
+            if pattern.search(user_lower):
                 return category
         return 'default'
     
-    def generate_response(self, user_input):
-        """Generate chatbot response"""
-        self.conversation_count += 1
+    def get_response_categories(self, user_inputs):
+        """Determine response categories for a batch of messages
+        
+        Queued messages repeat a lot ("ok", "terima kasih"), so each distinct
+        lower-cased message is scored once for the whole batch.
+        """
+        lowered = [user_input.lower() for user_input in user_inputs]
+        scored = dict.fromkeys(lowered)
+        for user_lower in scored:
+            scored[user_lower] = next((category for category, pattern in self._keyword_patterns
+                                       if pattern.search(user_lower)), 'default')
+        return [scored[user_lower] for user_lower in lowered]
+    
+    def generate_response(self, user_input, session=None, category=None):
+        """Generate chatbot response
+        
+        Conversation state lives on ``session`` (a ChatSession) when given,
+        so one shared chatbot can serve many users.
+        """
+        state = session if session is not None else self
+        state.conversation_count += 1
         
-        if self.conversation_count == 1:
+        if state.conversation_count == 1:
             response = random.choice(self.responses['greeting'])
             return response[0], response[1]
         
-        category = self.get_response_category(user_input)
+        if category is None:
+            category = self.get_response_category(user_input)
         if category in self.responses:
             response = random.choice(self.responses[category])
         else:
             response = random.choice(self.responses['default'])
         
         # Update context
-        self.context_stack.append({
-            'user': user_input,
-            'bot': response[0],
-            'timestamp': datetime.now().isoformat()
-        })
-        if len(self.context_stack) > self.max_context:
-            self.context_stack.pop(0)
+        state.context_stack.append((user_input, response[0], datetime.now().isoformat()))
+        if len(state.context_stack) > self.max_context:
+            state.context_stack.pop(0)
         
         return response[0], response[1]
     
+    @staticmethod
+    def encode_response(malay, english):
+        """Encode a /chat response body"""
+        payload = {'malay': malay, 'english': english, 'status': 'success'}
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(payload)
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    
+    def response_json(self, malay, english):
+        """Get the pre-encoded /chat body for a reply"""
+        body = self._response_json.get((malay, english))
+        if body is None:
+            body = self.encode_response(malay, english)
+        return body
+    
+    def get_statistics(self):
+        """Get chatbot statistics
+        
+        Conversation counts live on each learner's session, so only the
+        shared engine's fields are reported; turns are counted by the
+        maya_chat_turns_total metric.
+        """
+        return {
+            'vocabulary_size': sum(len(data['words']) for data in self.word_categories.values()),
+            'quiz_categories': len(self.word_categories),
+            'response_patterns': sum(len(options) for options in self.responses.values())
+        }
+    
     def generate_quiz(self, category=None):
         """Generate vocabulary quiz"""
         if category and category in self.word_categories:
@@ -129,11 +209,11 @@ class MalayChatbotWeb:
             selected_category = random.choice(list(self.word_categories.keys()))
         
         words = self.word_categories[selected_category]['words']
-        malay_word = random.choice(list(words.keys()))
+        malay_words, all_english = self._quiz_word_lists[selected_category]
+        malay_word = random.choice(malay_words)
         english_word = words[malay_word]
         
         # Create multiple choice options
-        all_english = list(words.values())
         wrong_options = [word for word in all_english if word != english_word]
         options = [english_word] + random.sample(wrong_options, min(3, len(wrong_options)))
         random.shuffle(options)
@@ -146,45 +226,353 @@ class MalayChatbotWeb:
             'correct_index': options.index(english_word)
         }
 
-# Initialize chatbot
+# Initialize chatbot (shared, read-only) and per-user sessions
 chatbot = MalayChatbotWeb()
+sessions = create_session_manager()
+quiz_signer = create_quiz_signer(sessions.secret_key)
+tts_cache = TTSCache()
+grammar_checker = GrammarChecker()
+rate_limiter = create_rate_limiter()
+load_shedder = create_load_shedder()
+
+API_PREFIXES = ('/chat', '/quiz')
+
+# Metrics exposed on /metrics
+metrics = MetricsRegistry()
+request_count = metrics.counter('maya_http_requests_total', 'HTTP requests by route and status',
+                                ('route', 'status'))
+request_latency = metrics.histogram('maya_http_request_duration_seconds',
+                                    'HTTP request latency by route', ('route',))
+rejected_count = metrics.counter('maya_http_rejected_total', 'Requests rejected with 429', ('route',))
+chat_error_count = metrics.counter('maya_chat_item_errors_total', 'Failed items in /chat/batch')
+chat_turn_count = metrics.counter('maya_chat_turns_total', 'Chat turns answered across all sessions')
+metrics.gauge('maya_sessions_active', 'Sessions held by the session backend',
+              lambda: {(): len(sessions.backend)})
+metrics.counter_callback('maya_quiz_pool_requests_total',
+                         'Quiz pool lookups served from the pool (hit) or built inline (miss)',
+                         lambda: {('hit',): quiz_pool.hits, ('miss',): quiz_pool.misses}, ('result',))
+metrics.gauge('maya_rate_limiter_clients', 'Clients tracked by the rate limiter',
+              lambda: {(): len(rate_limiter)})
+metrics.gauge('maya_latency_p95_seconds', 'Recent API p95 latency seen by the load shedder',
+              lambda: {(): load_shedder.p95})
+metrics.gauge('maya_load_shedding', '1 while optional stages are being shed',
+              lambda: {(): int(load_shedder.shedding)})
+metrics.gauge('maya_tts_available', '1 if gTTS audio rendering is available',
+              lambda: {(): int(tts_cache.available)})
+metrics.register_engine_stats('maya', chatbot)
+
+ROUTE_LABELS = ('/chat/batch', '/chat/stream', '/chat', '/quiz/check')
+
+def route_label(path):
+    """Collapse a request path to its route template for metric labels"""
+    if path in ROUTE_LABELS:
+        return path
+    if path.startswith('/quiz/'):
+        return '/quiz/<category>'
+    if path == '/metrics':
+        return path
+    return 'other'
+
+def record_request(path, status, seconds):
+    """Record one finished request in the metrics and load shedder"""
+    label = route_label(path)
+    request_count.inc(label, str(status))
+    request_latency.observe(seconds, label)
+    if status == 429:
+        rejected_count.inc(label)
+    if path.startswith(API_PREFIXES):
+        load_shedder.record(seconds)
+
+def identify_client(cookie, remote_addr):
+    """Rate-limit key and session cookie for a request
+    
+    Returns (key, cookie, issued). A request without a valid cookie is
+    issued one here, on any endpoint, so learners sharing an IP get their
+    own buckets from their second request on; that first request is still
+    charged to the IP so clients that drop cookies stay limited.
+    """
+    sid = sessions.verify_cookie(cookie)
+    if sid:
+        return f"sid:{sid}", cookie, False
+    return f"ip:{remote_addr}", sessions.issue_cookie(), True
+
+def admit_request(path, key):
+    """Decide whether to serve an API request
+    
+    Returns None when admitted, or (payload, retry_after_seconds) for a
+    429 response.
+    """
+    if not path.startswith(API_PREFIXES):
+        return None
+    if load_shedder.overloaded:
+        return {'status': 'error', 'message': 'Server busy, please retry'}, 1.0
+    allowed, retry_after = rate_limiter.acquire(key, ENDPOINT_COSTS.get(path, 1.0))
+    if not allowed:
+        return {'status': 'error', 'message': 'Too many requests'}, retry_after
+    return None
 
 @app.route('/')
 def index():
     """Main page"""
     return render_template('index.html')
 
+def handle_chat(user_message, cookie=None):
+    """Run one chat turn for the session in ``cookie``
+    
+    Returns the response payload and a cookie to set (or None). Shared by
+    the Flask routes and the ASGI app in web_app_asgi.py.
+    """
+    malay_response, english_translation, new_cookie = run_chat_turn(user_message, cookie)
+    payload = {
+        'malay': malay_response,
+        'english': english_translation,
+        'status': 'success'
+    }
+    return payload, new_cookie
+
+def handle_chat_bytes(user_message, cookie=None):
+    """Like handle_chat, but returns the pre-encoded JSON body"""
+    malay_response, english_translation, new_cookie = run_chat_turn(user_message, cookie)
+    return chatbot.response_json(malay_response, english_translation), new_cookie
+
+def run_chat_turn(user_message, cookie=None):
+    """Generate a reply within the caller's session; returns (malay, english, new_cookie)"""
+    with sessions.transaction(cookie) as (sid, session, is_new):
+        malay_response, english_translation = chatbot.generate_response(user_message, session)
+    chat_turn_count.inc()
+    return malay_response, english_translation, sessions.make_cookie(sid) if is_new else None
+
+def format_sse(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def check_grammar(text):
+    """Grammar feedback payload for the streaming endpoint"""
+    return {
+        'corrections': grammar_checker.check_grammar(text),
+        'pronunciation_tip': grammar_checker.get_pronunciation_tip(text)
+    }
+
+def render_audio(text):
+    """Render (or fetch cached) speech for a reply"""
+    url = tts_cache.get_url(text)
+    return {'url': url} if url else None
+
+def handle_chat_stream(user_message, cookie=None, include_grammar=False):
+    """Run one chat turn and split the reply into streamable stages
+    
+    Returns (ready_events, slow_stages, new_cookie). ``ready_events`` are
+    (event, data) pairs available immediately; ``slow_stages`` are
+    (event, callable) pairs whose result is sent once it is ready, or
+    skipped if it returns None.
+    """
+    payload, new_cookie = handle_chat(user_message, cookie)
+    malay = payload['malay']
+    ready_events = [('malay', {'malay': malay}), ('english', {'english': payload['english']})]
+    
+    # Over the latency SLO, optional stages are skipped rather than rejected
+    shedding = load_shedder.shedding
+    slow_stages = []
+    skipped = []
+    audio_url = tts_cache.cached_url(malay)
+    if audio_url:
+        ready_events.append(('audio', {'url': audio_url}))
+    elif tts_cache.available:
+        if shedding:
+            skipped.append('audio')
+        else:
+            slow_stages.append(('audio', lambda: render_audio(malay)))
+    if include_grammar:
+        if shedding:
+            skipped.append('grammar')
+        else:
+            slow_stages.append(('grammar', lambda: check_grammar(user_message)))
+    if skipped:
+        ready_events.append(('degraded', {'skipped': skipped}))
+    return ready_events, slow_stages, new_cookie
+
+MAX_BATCH_SIZE = 50
+
+def handle_chat_batch(messages, cookie=None):
+    """Run an ordered batch of queued chat messages for one session
+    
+    Invalid items get their own error entry without failing the batch.
+    """
+    if not isinstance(messages, list):
+        return {'status': 'error', 'message': 'messages must be a list'}, None
+    if len(messages) > MAX_BATCH_SIZE:
+        return {'status': 'error', 'message': f'At most {MAX_BATCH_SIZE} messages per batch'}, None
+    
+    results = [None] * len(messages)
+    valid = [(i, message) for i, message in enumerate(messages) if isinstance(message, str)]
+    for i, message in enumerate(messages):
+        if not isinstance(message, str):
+            results[i] = {'status': 'error', 'message': 'message must be a string'}
+    
+    # Scoring is pure, so it is done for the whole batch up front; each turn
+    # then runs (and may fail) on its own so no turn is ever applied twice
+    categories = chatbot.get_response_categories([message for _, message in valid])
+    replies = []
+    with sessions.transaction(cookie) as (sid, session, is_new):
+        for (_, message), category in zip(valid, categories):
+            try:
+                replies.append(chatbot.generate_response(message, session, category))
+            except Exception as e:
+                replies.append(e)
+    
+    for (i, _), reply in zip(valid, replies):
+        if isinstance(reply, Exception):
+            chat_error_count.inc()
+            results[i] = {'status': 'error', 'message': str(reply)}
+        else:
+            chat_turn_count.inc()
+            results[i] = {'malay': reply[0], 'english': reply[1], 'status': 'success'}
+    
+    payload = {'responses': results, 'status': 'success'}
+    return payload, sessions.make_cookie(sid) if is_new else None
+
+def handle_quiz(category):
+    """Build a quiz payload for a category ('random' for any)
+    
+    The answer is not sent to the client; instead the payload carries a
+    signed token that /quiz/check verifies.
+    """
+    quiz_data = chatbot.generate_quiz(category if category != 'random' else None)
+    quiz_id = f"{quiz_data['category']}:{quiz_data['malay_word']}"
+    return {
+        'category': quiz_data['category'],
+        'malay_word': quiz_data['malay_word'],
+        'options': quiz_data['options'],
+        'token': quiz_signer.issue(quiz_id, quiz_data['correct_index'], len(quiz_data['options']))
+    }
+
+def handle_quiz_bytes(category):
+    """Pop a pre-serialized quiz payload from the pool"""
+    if category not in chatbot.word_categories:
+        category = 'random'
+    return quiz_pool.get(category)
+
+quiz_pool = QuizPool(lambda category: json.dumps(handle_quiz(category)).encode('utf-8'),
+                     list(chatbot.word_categories) + ['random'],
+                     max_age=quiz_signer.ttl / 2)
+
+def handle_quiz_check(data):
+    """Grade a submitted quiz answer against its signed token"""
+    try:
+        quiz_id, correct_index = quiz_signer.verify(data.get('token'))
+        category, malay_word = quiz_id.split(':', 1)
+        correct_answer = chatbot.word_categories[category]['words'][malay_word]
+    except (QuizTokenError, KeyError, ValueError) as e:
+        return {'status': 'error', 'message': str(e) or 'Invalid quiz token'}
+    
+    is_correct = data.get('selected_index') == correct_index
+    return {
+        'correct': is_correct,
+        'answer': correct_answer,
+        'message': '✅ Betul! Correct!' if is_correct else '❌ Salah. Wrong.'
+    }
+
+@app.before_request
+def limit_request():
+    """Apply per-client rate limits and overload rejection"""
+    g.start_time = time.perf_counter()
+    key, g.session_cookie, g.cookie_issued = identify_client(
+        request.cookies.get(sessions.cookie_name), request.remote_addr)
+    rejection = admit_request(request.path, key)
+    if rejection:
+        payload, retry_after = rejection
+        response = jsonify(payload)
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+@app.after_request
+def record_latency(response):
+    """Record request metrics, feed API latency into the load shedder and
+    hand newly issued session cookies to the client"""
+    if 'start_time' in g:
+        record_request(request.path, response.status_code, time.perf_counter() - g.start_time)
+    if g.get('cookie_issued') and not any(header.startswith(sessions.cookie_name + '=')
+                                          for header in response.headers.getlist('Set-Cookie')):
+        response.set_cookie(sessions.cookie_name, g.session_cookie, httponly=True, samesite='Lax')
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Handle chat messages"""
     user_message = request.json.get('message', '')
-    malay_response, english_translation = chatbot.generate_response(user_message)
+    body, new_cookie = handle_chat_bytes(user_message, g.session_cookie)
     
-    return jsonify({
-        'malay': malay_response,
-        'english': english_translation,
-        'status': 'success'
-    })
+    response = Response(body, mimetype='application/json')
+    if new_cookie:
+        response.set_cookie(sessions.cookie_name, new_cookie, httponly=True, samesite='Lax')
+    return response
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Handle a batch of queued chat messages from offline clients"""
+    payload, new_cookie = handle_chat_batch(request.json.get('messages'),
+                                            g.session_cookie)
+    
+    response = jsonify(payload)
+    if payload['status'] != 'success':
+        response.status_code = 400
+    if new_cookie:
+        response.set_cookie(sessions.cookie_name, new_cookie, httponly=True, samesite='Lax')
+    return response
+
+@app.route('/chat/stream', methods=['GET', 'POST'])
+def chat_stream():
+    """Stream a chat reply as Server-Sent Events
+    
+    Emits 'malay', then 'english', then 'audio' and 'grammar' (if
+    requested) as they become available, and finally 'done'. Under load
+    a 'degraded' event lists the optional stages that were skipped.
+    """
+    data = request.get_json(silent=True) or request.args
+    user_message = data.get('message', '')
+    include_grammar = str(data.get('grammar', '')).lower() in ('1', 'true', 'yes')
+    ready_events, slow_stages, new_cookie = handle_chat_stream(
+        user_message, g.session_cookie, include_grammar)
+    
+    def generate():
+        for event, event_data in ready_events:
+            yield format_sse(event, event_data)
+        for event, stage in slow_stages:
+            try:
+                result = stage()
+            except Exception as e:
+                result = None
+                yield format_sse('error', {'stage': event, 'message': str(e)})
+            if result is not None:
+                yield format_sse(event, result)
+        yield format_sse('done', {'status': 'success'})
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    if new_cookie:
+        response.set_cookie(sessions.cookie_name, new_cookie, httponly=True, samesite='Lax')
+    return response
 
 @app.route('/quiz/<category>')
 def quiz(category=None):
     """Generate quiz"""
-    quiz_data = chatbot.generate_quiz(category if category != 'random' else None)
-    return jsonify(quiz_data)
+    return Response(handle_quiz_bytes(category), mimetype='application/json')
 
 @app.route('/quiz/check', methods=['POST'])
 def check_quiz():
     """Check quiz answer"""
-    selected_index = request.json.get('selected_index')
-    correct_index = request.json.get('correct_index')
-    correct_answer = request.json.get('correct_answer')
-    
-    is_correct = selected_index == correct_index
-    return jsonify({
-        'correct': is_correct,
-        'answer': correct_answer,
-        'message': '✅ Betul! Correct!' if is_correct else '❌ Salah. Wrong.'
-    })
+    result = handle_quiz_check(request.json)
+    response = jsonify(result)
+    if result.get('status') == 'error':
+        response.status_code = 400
+    return response
 
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
@@ -198,4 +586,5 @@ if __name__ == '__main__':
     print("🌐 Starting Maya Malay Chatbot Web App...")
     print("📱 Access on mobile: http://your-ip:5000")
     print("💻 Access locally: http://localhost:5000")
+    print("🏭 For classroom-scale serving use: python serve_production.py")
     app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file